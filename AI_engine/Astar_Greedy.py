@@ -1,15 +1,47 @@
 from collections import deque
 import heapq
+import time
 from .NodeClass import Node 
 from .Problem_definition import CropPredictionProblem , CropState
+from . import Metrics
+from .Log_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SearchBudgetExceeded(Exception):
+    """Raised inside a search pass when the node budget or time limit runs out."""
+
+
 class GraphSearch:
-    def __init__(self, problem):
+    STATE_KEYS = ("exact", "quantized", "actions")
+
+    def __init__(self, problem, state_key="exact", tolerance=1e-6):
         """
         Initialize the general search process with a problem instance.
+
+        state_key selects how states are identified in the closed set:
+          - "exact": the raw environment floats (original behaviour)
+          - "quantized": the environment rounded to multiples of `tolerance`
+          - "actions": the multiset of non-zero actions applied from the root
+        The last two also drop frontier duplicates, so permutations of the
+        same intervention plan are expanded once.
         """
+        if state_key not in self.STATE_KEYS:
+            raise ValueError(f"Unknown state_key '{state_key}', expected one of {self.STATE_KEYS}")
+        if tolerance <= 0:
+            raise ValueError("tolerance must be positive")
         self.problem = problem
         self.use_cost = False
         self.use_heuristic = False
+        self.state_key = state_key
+        self.tolerance = tolerance
+        self.stats = {}
+        self._max_nodes = None
+        self._deadline = None
+        self._strategy = None
+
+    SEARCH_STRATEGIES = ("A*", "Greedy_search", "Beam_search", "IDA*")
 
     def set_frontier(self, search_strategy="Greedy_search"):
         """Set up the frontier based on the search strategy."""
@@ -19,13 +51,199 @@ class GraphSearch:
         elif search_strategy == "Greedy_search":
             self.use_cost = False
             self.use_heuristic = True
+        elif search_strategy in ("Beam_search", "IDA*"):
+            self.use_cost = True
+            self.use_heuristic = True
         
 
-    def search(self, search_strategy="A*", max_depth=float('inf'), initial_node=None):
-        """Execute the search algorithm."""
-        
-        
+    def _heuristic_values(self, states):
+        """Heuristic values for a batch of child states (zeros when unused)."""
+        if not self.use_heuristic:
+            return [0] * len(states)
+        self.stats['heuristic_calls'] += len(states)
+        try:
+            if hasattr(self.problem, 'heuristic_batch'):
+                return [float(h) for h in self.problem.heuristic_batch(states)]
+            if hasattr(self.problem, 'heuristic'):
+                return [self.problem.heuristic(state) for state in states]
+        except Exception as e:
+            logger.warning("Could not calculate heuristic: %s", e)
+        return [0] * len(states)
+
+    def _finish_stats(self):
+        pruned = self.stats['closed_pruned'] + self.stats['frontier_pruned']
+        generated = self.stats['nodes_generated']
+        self.stats['prune_rate'] = pruned / generated if generated else 0.0
+        self._record_metrics()
+
+    def _record_metrics(self):
+        strategy = self._strategy
+        Metrics.observe("crop_search_nodes_expanded", self.stats['nodes_expanded'], strategy=strategy)
+        Metrics.observe("crop_search_frontier_peak", self.stats['frontier_peak'], strategy=strategy)
+        Metrics.inc("crop_search_heuristic_calls_total", self.stats['heuristic_calls'], strategy=strategy)
+        if self.stats['truncated']:
+            Metrics.inc("crop_search_truncated_total", strategy=strategy)
+
+    def _node_key(self, node):
+        """Closed-set key of a node under the configured state_key mode."""
+        if self.state_key == "quantized":
+            return tuple(round(value / self.tolerance) for value in node.state.environment)
+        if self.state_key == "actions":
+            parent_key = node.parent.key if node.parent is not None else ()
+            if node.action is None or not node.action[1]:
+                return parent_key
+            return tuple(sorted(parent_key + (node.action,)))
+        return hash(tuple(node.state.environment))
+
+    def _reset_stats(self):
+        self.stats = {
+            'nodes_expanded': 0,
+            'nodes_generated': 1,
+            'closed_pruned': 0,
+            'frontier_pruned': 0,
+            'frontier_peak': 1,
+            'prune_rate': 0.0,
+            'heuristic_calls': 0,
+            'truncated': False,
+        }
+
+    def _check_budget(self):
+        """Stop the search once the node budget or the deadline is used up."""
+        if self._max_nodes is not None and self.stats['nodes_expanded'] >= self._max_nodes:
+            raise SearchBudgetExceeded("node budget exhausted")
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise SearchBudgetExceeded("time limit reached")
+
+    def _evaluate_node(self, node, crop_candidates):
+        """
+        Goal-test a node and keep the cheapest node seen for each crop.
+        Returns (is_goal, crop_name, total_cost), or None if the goal check failed.
+        """
+        # Compute total cost f(n) from the heuristic cached on the node
+        current_total_cost = node.cost
+        if self.use_heuristic and node.h is not None:
+            current_total_cost += node.h
+
+        # Check if this is a goal state
+        try:
+            is_goal, crop_name = self.problem.is_goal(node.state)
+        except Exception as e:
+            logger.error("Error in goal check: %s", e)
+            return None
+
+        # Update best node for this crop if it has a lower total cost
+        if crop_name:
+            if crop_name not in crop_candidates or current_total_cost < crop_candidates[crop_name][0]:
+                crop_candidates[crop_name] = (current_total_cost, node)
+                logger.debug("Updated candidate for %s: cost=%s", crop_name, current_total_cost)
+
+        return is_goal, crop_name, current_total_cost
+
+    def _expand(self, node, keep_tree=False):
+        """Build the child nodes of `node`, each with its heuristic and closed-set key."""
+        # Get valid actions
+        try:
+            valid_actions = self.problem.get_valid_actions(node.state)
+        except Exception as e:
+            logger.error("Error getting valid actions: %s", e)
+            return []
+
+        if not valid_actions:
+            return []
+
+        child_states = []
+        for action in valid_actions:
+            try:
+                # Apply action to get new state
+                child_state = self.problem.apply_action(node.state, action)
+                if child_state is not None:
+                    child_states.append((action, child_state))
+            except Exception as e:
+                logger.error("Error processing action %s: %s", action, e)
+                continue
+
+        # Score every child of this expansion in one batch
+        h_values = self._heuristic_values([child_state for _, child_state in child_states])
+
+        children = []
+        for (action, child_state), h_value in zip(child_states, h_values):
+            try:
+                # Calculate costs
+                action_cost = 0
+                if self.use_cost and hasattr(self.problem, 'get_action_cost'):
+                    try:
+                        action_cost = self.problem.get_action_cost(action)
+                    except Exception as e:
+                        logger.warning("Could not get action cost: %s", e)
+
+                child_node = Node(
+                    state=child_state,
+                    parent=node,
+                    action=action,
+                    cost=node.cost + action_cost,
+                    h=h_value
+                )
+                child_node.key = self._node_key(child_node)
+            except Exception as e:
+                logger.error("Error processing action %s: %s", action, e)
+                continue
+
+            # Link for visualization
+            if keep_tree:
+                node.add_child(child_node)
+            children.append(child_node)
+
+        self.stats['nodes_generated'] += len(children)
+        return children
+
+    def _no_goal_result(self, crop_candidates):
+        """Fallback when no goal was reached: the 5 crops with the lowest total costs."""
+        self._finish_stats()
+        if crop_candidates:
+            top_crops = sorted(crop_candidates.items(), key=lambda x: x[1][0])[:5]
+            top_crops_result = [(crop, total_cost, node) for crop, (total_cost, node) in top_crops]
+            
+            return None, top_crops_result, None
+        else:
+            logger.info("No crops found after expanding %d nodes", self.stats['nodes_expanded'])
+            return None, [], None
+
+    def search(self, search_strategy="A*", max_depth=float('inf'), initial_node=None, keep_tree=False,
+               beam_width=50, ida_growth=0.5, transposition_limit=100000, max_nodes=None, time_limit=None):
+        """
+        Execute the search algorithm.
+
+        search_strategy is one of:
+          - "A*" / "Greedy_search": best-first search over an unbounded heap
+          - "Beam_search": level-by-level search keeping the `beam_width`
+            lowest f = g + h nodes, so memory is O(beam_width * actions)
+          - "IDA*": iterative-deepening A*; each iteration is a depth-first
+            pass bounded by f. The bound grows by at least `ida_growth`
+            (relative) per iteration, which keeps the number of iterations
+            small on continuous costs at the price of near-optimal plans.
+            At most `transposition_limit` keys are remembered per iteration.
+        Beam_search and IDA* need a finite max_depth.
+
+        max_nodes caps the number of node expansions and time_limit the
+        wall-clock seconds spent searching. When either runs out the search
+        stops and returns its anytime result (the top-5 candidates found so
+        far) with `self.stats['truncated']` set.
+
+        keep_tree links every child to its parent's `children` for
+        visualization; otherwise only parent pointers are kept (IDA* never
+        keeps the tree). Nodes expanded and peak frontier size are reported
+        in `self.stats`.
+
+        Returns (goal_node, crop_name, total_cost) when a goal is found, else
+        (None, [(crop, total_cost, node), ...top 5], None).
+        """
+        if search_strategy not in self.SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search_strategy '{search_strategy}', expected one of {self.SEARCH_STRATEGIES}")
+        if search_strategy in ("Beam_search", "IDA*") and max_depth == float('inf'):
+            raise ValueError(f"{search_strategy} requires a finite max_depth")
+
         self.set_frontier(search_strategy)
+        self._strategy = search_strategy
         
         # Ensure we have a valid initial state
         if not hasattr(self.problem, 'initial_state') or self.problem.initial_state is None:
@@ -40,134 +258,192 @@ class GraphSearch:
             h=self.problem.heuristic(self.problem.initial_state) if hasattr(self.problem, 'heuristic') else 0
         )
         
-        print(f"Root node created with state: {root.state}")
-        
+        logger.debug("Root node created with state: %s", root.state)
+
+        self.root = root
+        root.key = self._node_key(root)
+        self._reset_stats()
+        self._max_nodes = max_nodes
+        self._deadline = time.monotonic() + time_limit if time_limit is not None else None
+        self._crop_candidates = {}  # {crop_name: (total_cost, node)}, shared with the anytime result
+
+        try:
+            if search_strategy == "Beam_search":
+                return self._beam_search(root, max_depth, beam_width, keep_tree)
+            if search_strategy == "IDA*":
+                return self._ida_star(root, max_depth, ida_growth, transposition_limit)
+            return self._best_first_search(root, max_depth, keep_tree)
+        except SearchBudgetExceeded as e:
+            self.stats['truncated'] = True
+            logger.info("Search stopped early (%s) after expanding %d nodes", e, self.stats['nodes_expanded'])
+            return self._no_goal_result(self._crop_candidates)
+
+    def _best_first_search(self, root, max_depth, keep_tree):
+        """A* / Greedy search over a heap frontier."""
         frontier = [root]
         heapq.heapify(frontier)
-        self.root = root
         explored = {}
         nodes_expanded = 0
 
+        # Cheapest cost each key was pushed with, for frontier deduplication
+        dedup_frontier = self.state_key != "exact"
+        generated = {root.key: root.cost}
+
         # Track best node for each crop
-        crop_candidates = {}  # {crop_name: (total_cost, node)}
+        crop_candidates = self._crop_candidates
 
         while frontier:
+            self._check_budget()
             current_node = heapq.heappop(frontier)
             nodes_expanded += 1
-        
+            self.stats['nodes_expanded'] = nodes_expanded
 
             # Track last expanded for visualization
             self.last_expanded = current_node
-            
-            # Compute total cost f(n)
-            current_total_cost = current_node.cost
-            if self.use_heuristic and hasattr(self.problem, 'heuristic'):
-                try:
-                    heuristic_cost = self.problem.heuristic(current_node.state)
-                    current_total_cost += heuristic_cost
-                except Exception as e:
-                    print(f"Warning: Heuristic calculation failed: {e}")
-
-            # Check if this is a goal state
-            try:
-                is_goal, crop_name = self.problem.is_goal(current_node.state)
-                
-            except Exception as e:
-                print(f"Error in goal check: {e}")
-                continue
 
-            # Update best node for this crop if it has a lower total cost
-            if crop_name:
-                if crop_name not in crop_candidates or current_total_cost < crop_candidates[crop_name][0]:
-                    crop_candidates[crop_name] = (current_total_cost, current_node)
-                    print(f"Updated candidate for {crop_name}: cost={current_total_cost}")
+            result = self._evaluate_node(current_node, crop_candidates)
+            if result is None:
+                continue
+            is_goal, crop_name, current_total_cost = result
 
             if is_goal:
-                print(f"Goal found after expanding {nodes_expanded} nodes")
+                self._finish_stats()
+                logger.debug("Goal found after expanding %d nodes", nodes_expanded)
                 return current_node, crop_name, current_total_cost
 
             if current_node.depth >= max_depth:
                 
                 continue
 
-            # Create state hash for exploration tracking
-            try:
-                state_hash = hash(tuple(current_node.state.environment))
-            except Exception as e:
-                print(f"Error creating state hash: {e}")
-                continue
-
+            # Closed-set check on the node's transposition key
+            state_hash = current_node.key
             if state_hash in explored and explored[state_hash] <= current_node.cost:
+                self.stats['closed_pruned'] += 1
                 continue
 
             explored[state_hash] = current_node.cost
-             
-            # Get valid actions
-            try:
-                valid_actions = self.problem.get_valid_actions(current_node.state)
-                 
-            except Exception as e:
-                print(f"Error getting valid actions: {e}")
-                continue
 
-            if not valid_actions:
-                continue
+            for child_node in self._expand(current_node, keep_tree):
+                # Check if we should add to frontier
+                child_state_hash = child_node.key
 
-            for action in valid_actions:
-                try:
-                    # Apply action to get new state
-                    child_state = self.problem.apply_action(current_node.state, action)
-                    if child_state is None:
-                        continue
-                        
-                    # Calculate costs
-                    action_cost = 0
-                    if self.use_cost and hasattr(self.problem, 'get_action_cost'):
-                        try:
-                            action_cost = self.problem.get_action_cost(action)
-                        except Exception as e:
-                            print(f"Warning: Could not get action cost: {e}")
-                    
-                    new_cost = current_node.cost + action_cost
-                    
-                    h_value = 0
-                    if self.use_heuristic and hasattr(self.problem, 'heuristic'):
-                        try:
-                            h_value = self.problem.heuristic(child_state)
-                        except Exception as e:
-                            print(f"Warning: Could not calculate heuristic: {e}")
-
-                    child_node = Node(
-                        state=child_state,
-                        parent=current_node,
-                        action=action,
-                        cost=new_cost,
-                        h=h_value
-                    )
-
-                    # Link for visualization
-                    current_node.children.append(child_node)
-
-                    # Check if we should add to frontier
-                    try:
-                        child_state_hash = hash(tuple(child_state.environment))
-                    except Exception as e:
-                        print(f"Error creating child state hash: {e}")
+                if dedup_frontier:
+                    if child_state_hash in generated and generated[child_state_hash] <= child_node.cost:
+                        self.stats['frontier_pruned'] += 1
                         continue
-                        
-                    if child_state_hash not in explored or explored[child_state_hash] > child_node.cost:
-                        heapq.heappush(frontier, child_node)
+                    generated[child_state_hash] = child_node.cost
 
-                except Exception as e:
-                    print(f"Error processing action {action}: {e}")
-                    continue
+                if child_state_hash not in explored or explored[child_state_hash] > child_node.cost:
+                    heapq.heappush(frontier, child_node)
+                else:
+                    self.stats['frontier_pruned'] += 1
+
+            if len(frontier) > self.stats['frontier_peak']:
+                self.stats['frontier_peak'] = len(frontier)
 
         # No exact solution found, return top 5 crops with lowest total costs
-        if crop_candidates:
-            top_crops = sorted(crop_candidates.items(), key=lambda x: x[1][0])[:5]
-            top_crops_result = [(crop, total_cost, node) for crop, (total_cost, node) in top_crops]
-            
-            return None, top_crops_result, None
-        else:
-            print(f"No crops found after expanding {nodes_expanded} nodes.")
-            return None, [], None
\ No newline at end of file
+        return self._no_goal_result(crop_candidates)
+
+    def _beam_search(self, root, max_depth, beam_width, keep_tree):
+        """Width-bounded search: each level keeps only the best `beam_width` nodes by f."""
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
+
+        crop_candidates = self._crop_candidates
+        beam = [root]
+        kept_keys = {root.key}
+
+        while beam:
+            pool = {}  # key -> cheapest child for the next level
+            for node in beam:
+                self._check_budget()
+                self.stats['nodes_expanded'] += 1
+                self.last_expanded = node
+
+                result = self._evaluate_node(node, crop_candidates)
+                if result is None:
+                    continue
+                is_goal, crop_name, total_cost = result
+
+                if is_goal:
+                    self._finish_stats()
+                    logger.debug("Goal found after expanding %d nodes", self.stats['nodes_expanded'])
+                    return node, crop_name, total_cost
+
+                if node.depth >= max_depth:
+                    continue
+
+                for child in self._expand(node, keep_tree):
+                    if child.key in kept_keys or (child.key in pool and pool[child.key].cost <= child.cost):
+                        self.stats['frontier_pruned'] += 1
+                        continue
+                    pool[child.key] = child
+
+                self.stats['frontier_peak'] = max(self.stats['frontier_peak'], len(beam) + len(pool))
+
+            beam = heapq.nsmallest(beam_width, pool.values())
+            kept_keys.update(node.key for node in beam)
+
+        return self._no_goal_result(crop_candidates)
+
+    def _ida_star(self, root, max_depth, growth, transposition_limit):
+        """Iterative-deepening A*: repeated depth-first passes with a growing f bound."""
+        crop_candidates = self._crop_candidates
+        bound = root.f
+        self.stats['iterations'] = 0
+
+        while True:
+            self.stats['iterations'] += 1
+            self._pending = 1
+            table = {root.key: root.cost}
+            found, next_bound = self._ida_visit(root, bound, max_depth, crop_candidates, table, transposition_limit)
+            if found is not None:
+                self._finish_stats()
+                logger.debug("Goal found after expanding %d nodes", self.stats['nodes_expanded'])
+                return found
+            if next_bound == float('inf'):
+                break
+            bound = max(next_bound, bound * (1 + growth))
+
+        return self._no_goal_result(crop_candidates)
+
+    def _ida_visit(self, node, bound, max_depth, crop_candidates, table, transposition_limit):
+        """Depth-first pass of one IDA* iteration; returns (result or None, smallest f over the bound)."""
+        if node.f > bound:
+            return None, node.f
+
+        self._check_budget()
+        self.stats['nodes_expanded'] += 1
+        self.last_expanded = node
+
+        result = self._evaluate_node(node, crop_candidates)
+        if result is None:
+            return None, float('inf')
+        is_goal, crop_name, total_cost = result
+
+        if is_goal:
+            return (node, crop_name, total_cost), bound
+
+        if node.depth >= max_depth:
+            return None, float('inf')
+
+        children = sorted(self._expand(node), key=lambda child: child.f)
+        self._pending += len(children)
+        self.stats['frontier_peak'] = max(self.stats['frontier_peak'], self._pending)
+
+        minimum = float('inf')
+        for i, child in enumerate(children):
+            self._pending -= 1
+            if child.key in table and table[child.key] <= child.cost:
+                self.stats['closed_pruned'] += 1
+                continue
+            if child.key in table or len(table) < transposition_limit:
+                table[child.key] = child.cost
+
+            found, exceeded = self._ida_visit(child, bound, max_depth, crop_candidates, table, transposition_limit)
+            if found is not None:
+                self._pending -= len(children) - i - 1
+                return found, exceeded
+            minimum = min(minimum, exceeded)
+
+        return None, minimum
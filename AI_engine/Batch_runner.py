@@ -0,0 +1,253 @@
+"""
+Score many environments at once, e.g. a nightly export of field samples.
+
+    python -m AI_engine.Batch_runner fields.csv -o results.jsonl --engines astar,csp --workers 4
+
+Input is CSV (header with the seven feature columns, optional `id`) or JSON
+lines (one object per line with the same keys). Output is one JSON object per
+input row, in input order, written as soon as the row is scored.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from .Knowledge_base import FEATURES
+from .CSP import VALUE_ORDERS
+from .Problem_definition import CropPredictionProblem, CropState
+from .Engine_runner import run_search, run_genetic, run_constraint_solver, _get_pool, _discard_pool
+
+ENGINES = ("astar", "greedy", "genetic", "csp")
+INPUT_FORMATS = ("csv", "jsonl")
+
+DEFAULT_SEARCH_LIMITS = {'max_depth': 4, 'max_nodes': 20000, 'time_limit': 2.0}
+
+
+def detect_format(filename):
+    """Guess the input format from a file name ('csv' unless it looks like JSON lines)."""
+    name = (filename or '').lower()
+    return "jsonl" if name.endswith(('.jsonl', '.ndjson', '.json')) else "csv"
+
+
+def read_environments(stream, fmt="csv"):
+    """
+    Lazily yield (row_id, environment) pairs from a text stream.
+
+    Rows that aren't valid JSON objects or miss a feature yield
+    (row_id, ValueError) instead, so one bad line doesn't abort the batch.
+    row_id is the `id` field when present, otherwise the 1-based row number.
+    """
+    if fmt not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format '{fmt}', expected one of {INPUT_FORMATS}")
+
+    records = csv.DictReader(stream) if fmt == "csv" else stream
+    for number, record in enumerate(records, start=1):
+        if fmt == "jsonl":
+            if not record.strip():
+                continue
+            try:
+                record = json.loads(record)
+            except ValueError as e:
+                yield number, ValueError(f"Invalid row {number}: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield number, ValueError(f"Invalid row {number}: expected a JSON object, got {type(record).__name__}")
+                continue
+        row_id = record.get('id', number)
+        try:
+            yield row_id, [float(record[feature]) for feature in FEATURES]
+        except (KeyError, TypeError, ValueError) as e:
+            yield row_id, ValueError(f"Invalid row {number}: {e!r}")
+
+
+def _to_native(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _summarize_search(value):
+    node, crop_or_list, cost, stats = value
+    summary = {'perfect_match': bool(node) and isinstance(crop_or_list, str), 'truncated': stats.get('truncated', False),
+               'nodes_expanded': stats.get('nodes_expanded', 0)}
+    if summary['perfect_match']:
+        summary.update(crop=crop_or_list, cost=float(cost or 0))
+    elif isinstance(crop_or_list, list) and crop_or_list:
+        summary.update(crop=crop_or_list[0][0], cost=float(crop_or_list[0][1] or 0),
+                       alternatives=[[crop, float(alt_cost or 0)] for crop, alt_cost, *_ in crop_or_list])
+    else:
+        summary.update(crop=None, cost=None)
+    return summary
+
+
+def _summarize_genetic(value, problem):
+    best_solution, best_fitness, best_crop, top_crops = value
+    names = [name for name, _ in getattr(problem, 'interventions', [])]
+    return {
+        'crop': best_crop,
+        'fitness': float(best_fitness),
+        'interventions': {name: round(float(amount), 1) for name, amount in zip(names, best_solution or [])},
+        'top_crops': [[crop, float(score)] for crop, score in top_crops],
+    }
+
+
+def _summarize_csp(value):
+    if not value:
+        return {'crop': None, 'suitability_percentage': 0.0}
+    ranked = sorted(value.get('alternative_crops', {}).items(), key=lambda x: x[1]['percentage'], reverse=True)
+    top_name, top_data = ranked[0] if ranked else (value.get('crop'), {'percentage': 0.0})
+    return {
+        'crop': top_name,
+        'suitability_percentage': round(float(top_data['percentage']), 1),
+        'resources': value.get('resources', {}),
+    }
+
+
+def score_environment(row_id, environment, engines=ENGINES, mode="predict", data_file=None, search_limits=None,
+                      ga_params=None, csp_params=None):
+    """
+    Run the selected engines on one environment in this process and return a
+    JSON-serializable summary: {'id', 'input', 'results': {engine: summary}}.
+    An engine that fails gets {'error': message} instead of a summary. All
+    four engines score against the same dataset (`data_file`).
+    """
+    search_limits = DEFAULT_SEARCH_LIMITS if search_limits is None else search_limits
+    ga_params = ga_params or {}
+    csp_params = csp_params or {}
+    row = {'id': row_id, 'input': environment, 'results': {}}
+    problem = CropPredictionProblem(CropState(environment), data_file)
+
+    for engine in engines:
+        try:
+            if engine == "astar":
+                summary = _summarize_search(run_search(problem, "A*", **search_limits))
+            elif engine == "greedy":
+                summary = _summarize_search(run_search(problem, "Greedy_search", **search_limits))
+            elif engine == "genetic":
+                summary = _summarize_genetic(run_genetic(problem, mode, **ga_params), problem)
+            elif engine == "csp":
+                summary = _summarize_csp(run_constraint_solver(
+                    environment, knowledge_base=problem.knowledge_base, **csp_params))
+            else:
+                raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        except Exception as e:
+            summary = {'error': str(e)}
+        row['results'][engine] = summary
+    return row
+
+
+def run_batch(rows, engines=ENGINES, mode="predict", max_workers=None, max_pending=None, data_file=None,
+              search_limits=None, ga_params=None, csp_params=None, executor="process"):
+    """
+    Score (row_id, environment) pairs across a process pool.
+
+    Results are yielded in input order as soon as they are ready. At most
+    `max_pending` rows (default: 4 per worker) are in flight, so memory stays
+    bounded however long `rows` is. executor "serial" scores in this process
+    (as does "process" when already running inside a worker process).
+    """
+    engines = tuple(engines)
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines {unknown}, expected a subset of {ENGINES}")
+    options = {'engines': engines, 'mode': mode, 'data_file': data_file, 'search_limits': search_limits,
+               'ga_params': ga_params, 'csp_params': csp_params}
+
+    if executor == "process" and multiprocessing.parent_process() is not None:
+        executor = "serial"
+    if executor == "serial":
+        for row_id, environment in rows:
+            if isinstance(environment, Exception):
+                yield {'id': row_id, 'error': str(environment)}
+            else:
+                yield score_environment(row_id, environment, **options)
+        return
+
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    max_pending = max_pending or 4 * max_workers
+    pool = _get_pool("process", max_workers, "batch")
+    pending = deque()
+    try:
+        for row_id, environment in rows:
+            if isinstance(environment, Exception):
+                pending.append((row_id, environment))
+            else:
+                pending.append((row_id, pool.submit(score_environment, row_id, environment, **options)))
+            while len(pending) >= max_pending:
+                yield _row_result(*pending.popleft())
+        while pending:
+            yield _row_result(*pending.popleft())
+    except GeneratorExit:
+        # The consumer stopped early (e.g. the client disconnected)
+        for _, item in pending:
+            if not isinstance(item, Exception):
+                item.cancel()
+        raise
+    except BrokenProcessPool:
+        _discard_pool("process", "batch")
+        raise
+
+
+def _row_result(row_id, item):
+    if isinstance(item, Exception):
+        return {'id': row_id, 'error': str(item)}
+    try:
+        return item.result()
+    except BrokenProcessPool:
+        raise
+    except Exception as e:
+        return {'id': row_id, 'error': str(e)}
+
+
+def to_json_line(row):
+    """Serialize one result row as a JSON line."""
+    return json.dumps(row, default=_to_native) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score many soil/climate samples with the crop engines.")
+    parser.add_argument("input", help="CSV or JSON-lines file of environments ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSON-lines output file (default: stdout)")
+    parser.add_argument("--format", choices=INPUT_FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"comma-separated subset of {','.join(ENGINES)}")
+    parser.add_argument("--mode", choices=("predict", "classify"), default="predict")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: min(4, CPUs))")
+    parser.add_argument("--seed", type=int, default=0, help="GA seed, for reproducible runs")
+    parser.add_argument("--data-file", default=None, help="crop dataset CSV (default: data/Crop_Data.csv)")
+    parser.add_argument("--csp-value-order", choices=VALUE_ORDERS, default="lcv", help="CSP value ordering")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.input)
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    scored = failed = 0
+    try:
+        # Engine progress messages go to stderr so stdout carries only results
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_batch(read_environments(source, fmt), engines=engines, mode=args.mode,
+                                max_workers=args.workers, data_file=args.data_file, ga_params={'seed': args.seed},
+                                csp_params={'value_order': args.csp_value_order})
+            for row in results:
+                sink.write(to_json_line(row))
+                sink.flush()
+                scored += 1
+                failed += 'error' in row
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(f"Scored {scored} rows ({failed} failed)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+Repeatable benchmark of the four engines on inputs sampled from the dataset.
+
+    python -m AI_engine.Benchmark --samples 20 -o benchmark.json
+    python -m AI_engine.Benchmark --samples 20 -o new.json --baseline benchmark.json
+
+Every engine runs on the same sampled environments, one after another in this
+process, with a fixed GA seed and no search time limit, so the work counters
+are identical between runs on the same code. Each input blends a dataset row
+with another row (--mix), so it matches no crop outright and the searches
+have to expand nodes. Per engine the report holds wall time, peak traced
+memory, nodes expanded (A*, Greedy, CSP) and fitness evaluations (GA). With
+--baseline the work counters and memory are compared against an earlier
+report (timings too with --compare-time) and the exit status is 1 if any
+engine regressed by more than the tolerance.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .Knowledge_base import FEATURES, get_knowledge_base
+from .Problem_definition import CropPredictionProblem, CropState
+from .Astar_Greedy import GraphSearch
+from .Genetic import GeneticAlgorithm
+from .CSP import CSPSolver, DEFAULT_RESOURCE_LIMITS
+
+ENGINES = ("astar", "greedy", "genetic", "csp")
+REPORT_VERSION = 2
+
+# Summary fields compared against a baseline; counters only change with the algorithms themselves
+COMPARED_METRICS = ("peak_mb_max", "nodes_expanded_mean", "fitness_evaluations_mean")
+# Compared only on request: a few milliseconds of jitter is a large relative change for the fast engines
+TIME_METRICS = ("time_median_s", "time_p95_s")
+
+
+def sample_environments(samples=20, seed=0, data_file=None, mix=0.5):
+    """
+    Pick `samples` dataset rows (without replacement, reproducible for a
+    seed), blend each with another random row by weight `mix` and return
+    them as [{'row', 'mixed_with', 'label', 'environment'}]. Dataset rows
+    match their own crop, so with mix=0 the searches stop at the root.
+    """
+    dataset = get_knowledge_base(data_file).dataset
+    picked = dataset.sample(n=min(samples, len(dataset)), random_state=seed)
+    others = np.random.default_rng(seed).choice(len(dataset), size=len(picked))
+    features = dataset[list(FEATURES)].to_numpy()
+    environments = (1 - mix) * picked[list(FEATURES)].to_numpy() + mix * features[others]
+    return [
+        {'row': int(row), 'mixed_with': int(dataset.index[other]), 'label': label,
+         'environment': [float(v) for v in values]}
+        for row, other, label, values in zip(picked.index, others, picked['Crop_Type'], environments)
+    ]
+
+
+def _search_engine(strategy, max_depth=4, max_nodes=20000):
+    def run(environment, data_file=None, **_):
+        graph_search = GraphSearch(CropPredictionProblem(CropState(environment), data_file), state_key="quantized")
+        graph_search.search(strategy, max_depth=max_depth, max_nodes=max_nodes)
+        return {
+            'nodes_expanded': graph_search.stats['nodes_expanded'],
+            'nodes_generated': graph_search.stats['nodes_generated'],
+            'truncated': graph_search.stats['truncated'],
+        }
+    return run
+
+
+def _genetic_engine(environment, data_file=None, mode="predict", seed=0):
+    ga = GeneticAlgorithm(CropPredictionProblem(CropState(environment), data_file), seed=seed)
+    ga.solve(mode)
+    cache = ga.cache_stats
+    return {'fitness_evaluations': cache['misses'], 'fitness_lookups': cache['hits'] + cache['misses']}
+
+
+def _csp_engine(environment, data_file=None, **_):
+    # Same solver run_csp uses, kept so its node count can be read back
+    solver = CSPSolver(np.array(environment), get_knowledge_base(data_file).crop_requirements,
+                       dict(DEFAULT_RESOURCE_LIMITS))
+    solver.solve()
+    return dict(solver.stats)
+
+
+DEFAULT_ENGINES = {
+    'astar': _search_engine("A*"),
+    'greedy': _search_engine("Greedy_search"),
+    'genetic': _genetic_engine,
+    'csp': _csp_engine,
+}
+
+
+class AlgorithmComparator:
+    """
+    Runs each algorithm on an input and records wall time, peak memory and
+    the counters the algorithm returns.
+
+    `algorithms` maps names to functions(environment, **options) returning a
+    dict of counters. Time is measured on an untraced run; when
+    `measure_memory` is set, a second run under tracemalloc gives the peak.
+    """
+    def __init__(self, algorithms, repeat=1, measure_memory=True, **options):
+        self.algorithms = algorithms
+        self.repeat = repeat
+        self.measure_memory = measure_memory
+        self.options = options
+        self.results = []
+
+    def _measure_time_and_memory(self, func, data):
+        times = []
+        for _ in range(self.repeat):
+            start_time = time.perf_counter()
+            counters = func(data, **self.options)
+            times.append(time.perf_counter() - start_time)
+
+        peak_mb = None
+        if self.measure_memory:
+            tracemalloc.start()
+            try:
+                func(data, **self.options)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peak_mb = peak / 10**6
+        return min(times), peak_mb, counters
+
+    def compare(self, sample):
+        """Run every algorithm on one sample (see `sample_environments`) and return the new result rows."""
+        rows = []
+        for name, func in self.algorithms.items():
+            row = {'engine': name, 'row': sample['row'], 'mixed_with': sample.get('mixed_with'), 'label': sample['label']}
+            try:
+                time_s, peak_mb, counters = self._measure_time_and_memory(func, sample['environment'])
+                row.update(time_s=time_s, peak_mb=peak_mb, **counters)
+            except Exception as e:
+                row.update(time_s=None, peak_mb=None, error=str(e))
+            rows.append(row)
+        self.results.extend(rows)
+        return rows
+
+
+def _stats(values, prefix):
+    values = [v for v in values if v is not None]
+    if not values:
+        return {}
+    array = np.asarray(values, dtype=float)
+    return {
+        f'{prefix}_mean': float(array.mean()),
+        f'{prefix}_median': float(np.median(array)),
+        f'{prefix}_p95': float(np.percentile(array, 95)),
+        f'{prefix}_max': float(array.max()),
+    }
+
+
+def summarize(results):
+    """Per-engine summary of the result rows: time and memory statistics plus mean counters."""
+    summary = {}
+    for engine in dict.fromkeys(row['engine'] for row in results):
+        rows = [row for row in results if row['engine'] == engine]
+        ok = [row for row in rows if 'error' not in row]
+        entry = {'runs': len(rows), 'errors': len(rows) - len(ok)}
+        times = _stats([row['time_s'] for row in ok], 'time')
+        entry.update({key + '_s': value for key, value in times.items()})
+        entry['time_total_s'] = float(sum(row['time_s'] for row in ok))
+        memory = [row['peak_mb'] for row in ok if row['peak_mb'] is not None]
+        if memory:
+            entry['peak_mb_mean'] = float(np.mean(memory))
+            entry['peak_mb_max'] = float(np.max(memory))
+        for counter in ('nodes_expanded', 'nodes_generated', 'fitness_evaluations', 'fitness_lookups'):
+            counts = [row[counter] for row in ok if counter in row]
+            if counts:
+                entry[f'{counter}_mean'] = float(np.mean(counts))
+        truncated = [row['truncated'] for row in ok if 'truncated' in row]
+        if truncated:
+            entry['truncated'] = int(sum(truncated))
+        summary[engine] = entry
+    return summary
+
+
+def run_benchmark(samples=20, seed=0, engines=ENGINES, mode="predict", repeat=1, measure_memory=True, data_file=None,
+                  mix=0.5):
+    """Benchmark the selected engines on sampled inputs and return the report dictionary."""
+    unknown = [engine for engine in engines if engine not in DEFAULT_ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engines {unknown}, expected a subset of {ENGINES}")
+
+    inputs = sample_environments(samples, seed, data_file, mix)
+    comparator = AlgorithmComparator({engine: DEFAULT_ENGINES[engine] for engine in engines}, repeat=repeat,
+                                     measure_memory=measure_memory, data_file=data_file, mode=mode, seed=seed)
+    # Warm-up run so one-off costs (dataset load, imports) aren't charged to the first sample
+    AlgorithmComparator(comparator.algorithms, measure_memory=False, **comparator.options).compare(inputs[0])
+    for sample in inputs:
+        comparator.compare(sample)
+
+    knowledge_base = get_knowledge_base(data_file)
+    return {
+        'version': REPORT_VERSION,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset_version': knowledge_base.version,
+        'settings': {'samples': len(inputs), 'seed': seed, 'mix': mix, 'engines': list(engines), 'mode': mode,
+                     'repeat': repeat},
+        'engines': summarize(comparator.results),
+        'runs': comparator.results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.25, compare_time=False, min_time_delta=0.01):
+    """
+    Regressions of `report` against `baseline`: a metric counts when it grew
+    by more than `tolerance` (relative). Timings are only compared with
+    `compare_time`, and must then also have grown by at least
+    `min_time_delta` seconds, so scheduling jitter is ignored.
+
+    Returns (regressions, warnings), both lists.
+    """
+    warnings = []
+    if report.get('version') != baseline.get('version'):
+        warnings.append(f"report version differs from the baseline ({baseline.get('version')} -> {report.get('version')})")
+    if report.get('dataset_version') != baseline.get('dataset_version'):
+        warnings.append(f"dataset version differs from the baseline "
+                        f"({baseline.get('dataset_version')} -> {report.get('dataset_version')})")
+    if report.get('settings') != baseline.get('settings'):
+        warnings.append(f"settings differ from the baseline ({baseline.get('settings')} -> {report.get('settings')})")
+
+    regressions = []
+    for engine, current in report['engines'].items():
+        previous = baseline.get('engines', {}).get(engine)
+        if previous is None:
+            warnings.append(f"{engine} is not in the baseline")
+            continue
+        if current.get('errors', 0) > previous.get('errors', 0):
+            regressions.append({'engine': engine, 'metric': 'errors', 'baseline': previous.get('errors', 0),
+                                'current': current['errors'], 'change': None})
+        for metric in COMPARED_METRICS + (TIME_METRICS if compare_time else ()):
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None or new <= old * (1 + tolerance):
+                continue
+            if metric.startswith('time') and new - old < min_time_delta:
+                continue
+            regressions.append({'engine': engine, 'metric': metric, 'baseline': old, 'current': new,
+                                'change': (new - old) / old if old else None})
+    return regressions, warnings
+
+
+def format_summary(report):
+    """Plain-text table of the per-engine summaries."""
+    lines = [f"{'engine':<8} {'runs':>4} {'err':>3} {'median ms':>10} {'p95 ms':>9} {'peak MB':>8} "
+             f"{'nodes':>9} {'fit evals':>9}"]
+    for engine, entry in report['engines'].items():
+        def fmt(key, scale=1.0, width=9, digits=1):
+            value = entry.get(key)
+            return f"{value * scale:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+        lines.append(f"{engine:<8} {entry['runs']:>4} {entry['errors']:>3} {fmt('time_median_s', 1000, 10, 2)} "
+                     f"{fmt('time_p95_s', 1000, 9, 2)} {fmt('peak_mb_max', 1, 8, 2)} {fmt('nodes_expanded_mean')} "
+                     f"{fmt('fitness_evaluations_mean')}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the crop engines on inputs sampled from the dataset.")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--samples", type=int, default=20, help="number of dataset rows to run (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="sampling and GA seed (default: 0)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"comma-separated subset of {','.join(ENGINES)}")
+    parser.add_argument("--mode", choices=("predict", "classify"), default="predict")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per input, the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run (halves the time)")
+    parser.add_argument("--data-file", default=None, help="crop dataset CSV (default: data/Crop_Data.csv)")
+    parser.add_argument("--baseline", default=None, help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative growth (default: 0.25)")
+    parser.add_argument("--mix", type=float, default=0.5,
+                        help="weight of the second row blended into each input; 0 runs plain dataset rows (default: 0.5)")
+    parser.add_argument("--compare-time", action="store_true",
+                        help="also check timings against the baseline (noisy on shared machines)")
+    args = parser.parse_args(argv)
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    # Engine progress messages would only add I/O to the timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        report = run_benchmark(args.samples, args.seed, engines, args.mode, args.repeat, not args.no_memory,
+                               args.data_file, args.mix)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, warnings = compare_to_baseline(report, baseline, args.tolerance, args.compare_time)
+        report['baseline'] = {'path': args.baseline, 'tolerance': args.tolerance, 'compare_time': args.compare_time,
+                              'regressions': regressions, 'warnings': warnings}
+        for warning in warnings:
+            print(f"Warning: {warning}", file=sys.stderr)
+        for r in regressions:
+            change = f" (+{r['change']:.0%})" if r['change'] is not None else ""
+            print(f"Regression: {r['engine']} {r['metric']} {r['baseline']:.4g} -> {r['current']:.4g}{change}",
+                  file=sys.stderr)
+        status = 1 if regressions else 0
+
+    print(format_summary(report), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,69 @@
 
 import numpy as np
 from collections import defaultdict, deque
-import pandas as pd
 import os
+from AI_engine.Knowledge_base import get_knowledge_base
+from AI_engine import Metrics
+from AI_engine.Log_config import get_logger
+
+logger = get_logger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_RESOURCE_LIMITS = {'fertilizer': 300, 'water': 300, 'organic_matter': 20}
+
+
+def _bits(mask):
+    """Bitset (int, bit i = value i) of the True entries of a boolean array."""
+    return int.from_bytes(np.packbits(np.asarray(mask, dtype=bool), bitorder='little').tobytes(), 'little')
+
+
+def _vector(bits, size):
+    """The bitset as a 0/1 array of length `size`."""
+    data = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(data, count=size, bitorder='little').astype(np.int32)
+
+
+def _positions(bits):
+    """Indices of the set bits, ascending."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
 class CSPVariable:
+    """
+    A variable whose current domain is a bitset over its full, fixed list of
+    values, so pruning and restoring are single integer operations.
+    """
     def __init__(self, name, domain):
         self.name = name
-        self.domain = list(domain)
+        self.values = tuple(domain)
+        self.array = np.asarray(self.values)
+        self.index = {value: i for i, value in enumerate(self.values)}
+        self.full = (1 << len(self.values)) - 1
+        self.bits = self.full
+
+    @property
+    def domain(self):
+        return [self.values[i] for i in _positions(self.bits)]
+
+    @property
+    def size(self):
+        return self.bits.bit_count()
 
 class CSPConstraint:
-    def __init__(self, variables, constraint_function, is_soft=False, penalty=0):
+    """
+    `table`, if given, is a vectorized form of the constraint used to compile
+    it: called with each variable's full list of values, it returns the
+    boolean array of satisfied combinations (one axis per variable).
+    """
+    def __init__(self, variables, constraint_function, is_soft=False, penalty=0, table=None):
         self.variables = variables
         self.constraint_function = constraint_function
         self.is_soft = is_soft
         self.penalty = penalty
+        self.table = table
 
     def is_satisfied(self, assignment):
         return self.constraint_function(assignment)
@@ -23,8 +71,22 @@ class CSPConstraint:
     def get_penalty(self, assignment):
         return self.penalty if self.is_soft and not self.is_satisfied(assignment) else 0
 
+class SumLimitConstraint(CSPConstraint):
+    """The assigned variables must sum to at most `limit` (unassigned ones count as 0)."""
+    def __init__(self, variables, limit, is_soft=False, penalty=0):
+        self.limit = limit
+        super().__init__(variables, self._within_limit, is_soft, penalty)
+
+    def _within_limit(self, assignment):
+        return sum(assignment.get(v, 0) for v in self.variables) <= self.limit
+
+VALUE_ORDERS = ("lcv", "domain")
+
 class AgriculturalCSP:
-    def __init__(self, crop_requirements, initial_environment, resource_limits):
+    def __init__(self, crop_requirements, initial_environment, resource_limits, value_order="lcv"):
+        if value_order not in VALUE_ORDERS:
+            raise ValueError(f"Unknown value order '{value_order}', expected one of {VALUE_ORDERS}")
+        self.value_order = value_order
         self.crop_requirements = crop_requirements
         self.initial_environment = {f: initial_environment[i] for i, f in enumerate(['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall'])}
         self.resource_limits = resource_limits
@@ -33,8 +95,11 @@ class AgriculturalCSP:
         self.constraints = []
         self.best_assignment = {}
         self.best_score = -float('inf')
+        self.nodes_expanded = 0
+        self.revisions = 0
         self._initialize_variables()
         self._add_constraints()
+        self._compile_constraints()
 
     def _initialize_variables(self):
         domain_ranges = {
@@ -49,6 +114,11 @@ class AgriculturalCSP:
             self.variables[var] = CSPVariable(var, domain)
 
     def _add_constraints(self):
+        # Requirement bounds per feature, in the order of the Crop domain, for the constraint tables
+        crops = self.variables['Crop'].values
+        bounds = {f: np.array([self.crop_requirements[crop][f] for crop in crops], dtype=float).reshape(-1, 2)
+                  for f in self.feature_names}
+
         for feature in ['N', 'P', 'K', 'temperature', 'humidity', 'ph']:
             def climate_constraint(assignment, feature=feature):
                 if 'Crop' not in assignment:
@@ -56,7 +126,10 @@ class AgriculturalCSP:
                 crop = assignment['Crop']
                 min_val, max_val = self.crop_requirements[crop][feature]
                 return min_val <= self.initial_environment[feature] <= max_val
-            self.constraints.append(CSPConstraint(['Crop'], climate_constraint))
+            def climate_table(crops, feature=feature):
+                value = self.initial_environment[feature]
+                return (bounds[feature][:, 0] <= value) & (value <= bounds[feature][:, 1])
+            self.constraints.append(CSPConstraint(['Crop'], climate_constraint, table=climate_table))
 
         def water_constraint(assignment):
             if 'Crop' not in assignment or 'Irrigation' not in assignment:
@@ -65,12 +138,13 @@ class AgriculturalCSP:
             min_val, max_val = self.crop_requirements[crop]['rainfall']
             total_water = self.initial_environment['rainfall'] + assignment['Irrigation']
             return min_val <= total_water <= max_val
-        self.constraints.append(CSPConstraint(['Crop', 'Irrigation'], water_constraint))
+        def water_table(crops, irrigation):
+            total_water = self.initial_environment['rainfall'] + np.asarray(irrigation)
+            return (bounds['rainfall'][:, [0]] <= total_water) & (total_water <= bounds['rainfall'][:, [1]])
+        self.constraints.append(CSPConstraint(['Crop', 'Irrigation'], water_constraint, table=water_table))
 
-        def fertilizer_limit(assignment):
-            total_fertilizer = sum(assignment.get(f, 0) for f in ['Fertilizer_N', 'Fertilizer_P', 'Fertilizer_K'])
-            return total_fertilizer <= self.resource_limits['fertilizer']
-        self.constraints.append(CSPConstraint(['Fertilizer_N', 'Fertilizer_P', 'Fertilizer_K'], fertilizer_limit))
+        self.constraints.append(SumLimitConstraint(['Fertilizer_N', 'Fertilizer_P', 'Fertilizer_K'],
+                                                   self.resource_limits['fertilizer']))
 
         def irrigation_limit(assignment):
             if 'Irrigation' in assignment:
@@ -84,10 +158,8 @@ class AgriculturalCSP:
             return True
         self.constraints.append(CSPConstraint(['Organic_Matter'], organic_matter_limit))
 
-        def minimize_fertilizer(assignment):
-            total_fertilizer = sum(assignment.get(f, 0) for f in ['Fertilizer_N', 'Fertilizer_P', 'Fertilizer_K'])
-            return total_fertilizer <= 100
-        self.constraints.append(CSPConstraint(['Fertilizer_N', 'Fertilizer_P', 'Fertilizer_K'], minimize_fertilizer, is_soft=True, penalty=10))
+        self.constraints.append(SumLimitConstraint(['Fertilizer_N', 'Fertilizer_P', 'Fertilizer_K'], 100,
+                                                   is_soft=True, penalty=10))
 
         def minimize_irrigation(assignment):
             if 'Irrigation' in assignment:
@@ -133,15 +205,88 @@ class AgriculturalCSP:
         score = suitability - (cost_F + cost_I + cost_O)
         return score
 
-    def is_consistent(self, variable, value, assignment):
-        assignment[variable] = value
+    def _compile_constraints(self):
+        """
+        Precompute the hard constraints over the variables' full domains (from
+        each constraint's `table` when it has one) so propagation never calls
+        the constraint functions:
+          - unary constraints become one bitset of allowed values per variable,
+          - binary constraints a boolean compatibility matrix per variable pair,
+            kept as one bitset of supported xi values per value of xj,
+          - sum limits a vectorized budget check (memoized by amount spent).
+        Any other n-ary constraint is checked by calling its function.
+        """
+        self.unary_masks = {name: var.full for name, var in self.variables.items()}
+        self.compatibility = {}
+        self._supports = {}
+        self._neighbors = defaultdict(list)
+        self._sum_limits = defaultdict(list)
+        self._other_constraints = defaultdict(list)
+        self._related = defaultdict(set)
+        self._budget_cache = {}
+        self._support_counts = None
+
         for constraint in self.constraints:
-            if not constraint.is_soft and variable in constraint.variables:
-                if not constraint.is_satisfied(assignment):
-                    del assignment[variable]
-                    return False
-        del assignment[variable]
-        return True
+            if constraint.is_soft:
+                continue
+            for name in constraint.variables:
+                self._related[name].update(v for v in constraint.variables if v != name)
+            if len(constraint.variables) == 1:
+                var = self.variables[constraint.variables[0]]
+                if constraint.table is not None:
+                    mask = constraint.table(var.values)
+                else:
+                    mask = [constraint.is_satisfied({var.name: value}) for value in var.values]
+                self.unary_masks[var.name] &= _bits(mask)
+            elif len(constraint.variables) == 2:
+                xi, xj = constraint.variables
+                if constraint.table is not None:
+                    matrix = np.asarray(constraint.table(self.variables[xi].values, self.variables[xj].values), dtype=bool)
+                else:
+                    matrix = np.array([[constraint.is_satisfied({xi: x, xj: y}) for y in self.variables[xj].values]
+                                       for x in self.variables[xi].values], dtype=bool)
+                self._add_compatibility(xi, xj, matrix)
+                self._add_compatibility(xj, xi, matrix.T)
+            else:
+                bucket = self._sum_limits if isinstance(constraint, SumLimitConstraint) else self._other_constraints
+                for name in constraint.variables:
+                    bucket[name].append(constraint)
+
+    def _add_compatibility(self, xi, xj, matrix):
+        if (xi, xj) in self.compatibility:
+            matrix = self.compatibility[(xi, xj)] & matrix
+        else:
+            self._neighbors[xi].append(xj)
+        self.compatibility[(xi, xj)] = matrix
+        self._supports[(xi, xj)] = tuple(_bits(matrix[:, j]) for j in range(matrix.shape[1]))
+
+    def _budget_mask(self, variable, limit, spent):
+        key = (variable, limit, spent)
+        mask = self._budget_cache.get(key)
+        if mask is None:
+            mask = self._budget_cache[key] = _bits(self.variables[variable].array + spent <= limit)
+        return mask
+
+    def _allowed_values(self, variable, assignment):
+        """Bitset of `variable`'s values consistent with `assignment` under every hard constraint on it."""
+        allowed = self.unary_masks[variable]
+        for other in self._neighbors[variable]:
+            if other in assignment:
+                allowed &= self._supports[(variable, other)][self.variables[other].index[assignment[other]]]
+        for constraint in self._sum_limits[variable]:
+            spent = sum(assignment[v] for v in constraint.variables if v != variable and v in assignment)
+            allowed &= self._budget_mask(variable, constraint.limit, spent)
+        if self._other_constraints[variable]:
+            values = self.variables[variable].values
+            trial = dict(assignment)
+            for i in _positions(allowed):
+                trial[variable] = values[i]
+                if not all(c.is_satisfied(trial) for c in self._other_constraints[variable]):
+                    allowed &= ~(1 << i)
+        return allowed
+
+    def is_consistent(self, variable, value, assignment):
+        return bool(self._allowed_values(variable, assignment) >> self.variables[variable].index[value] & 1)
 
     def select_unassigned_variable(self, assignment):
         unassigned = [var for var in self.variables if var not in assignment]
@@ -149,27 +294,84 @@ class AgriculturalCSP:
             return None
         if 'Crop' in unassigned:
             return 'Crop'
-        return min(unassigned, key=lambda var: len(self.variables[var].domain))
+        return min(unassigned, key=lambda var: self.variables[var].size)
+
+    def _get_support_counts(self):
+        """
+        {(xi, xj): array} where entry x is how many values left in xj's domain
+        are compatible with value x of xi, for every binary constraint pair.
+        Built on first use, then kept up to date as domains shrink and grow.
+        """
+        if self._support_counts is None:
+            self._support_counts = {
+                (xi, xj): matrix.astype(np.int32) @ _vector(self.variables[xj].bits, matrix.shape[1])
+                for (xi, xj), matrix in self.compatibility.items()
+            }
+        return self._support_counts
+
+    def _domain_changed(self, name, bits, sign):
+        # `bits` were removed from (sign -1) or put back into (sign +1) name's domain
+        if self._support_counts is None:
+            return
+        changed = _vector(bits, len(self.variables[name].values))
+        for other in self._neighbors[name]:
+            self._support_counts[(other, name)] += sign * (self.compatibility[(other, name)] @ changed)
+
+    def _remaining_values(self, variable, assignment):
+        """
+        For each value of `variable`, how many values would stay in the domains
+        of the unassigned variables it shares a constraint with if it were
+        assigned. Domains are forward-checked against `assignment`, so only the
+        constraints involving `variable` can remove more.
+        """
+        var = self.variables[variable]
+        remaining = np.zeros(len(var.values), dtype=np.int64)
+        for name in self._related[variable]:
+            if name in assignment:
+                continue
+            other = self.variables[name]
+            if any(variable in c.variables for c in self._other_constraints[name]):
+                # Generic n-ary constraint: check each value against the trial assignment
+                for i in _positions(var.bits):
+                    assignment[variable] = var.values[i]
+                    remaining[i] += (other.bits & self._allowed_values(name, assignment)).bit_count()
+                del assignment[variable]
+                continue
+            sums = [c for c in self._sum_limits[name] if variable in c.variables]
+            if not sums:
+                remaining += self._get_support_counts()[(variable, name)]
+                continue
+            # (values of variable x values of other) grid of the pairs still allowed
+            kept = _vector(other.bits, len(other.values)).astype(bool)[np.newaxis, :]
+            if (variable, name) in self.compatibility:
+                kept = kept & self.compatibility[(variable, name)]
+            for c in sums:
+                spent = sum(assignment[v] for v in c.variables if v not in (variable, name) and v in assignment)
+                kept = kept & (other.array[np.newaxis, :] + (spent + var.array)[:, np.newaxis] <= c.limit)
+            remaining += kept.sum(axis=1)
+        return remaining
 
     def order_domain_values(self, variable, assignment):
-        def count_conflicts(value):
-            conflicts = 0
-            assignment[variable] = value
-            for other_var in self.variables:
-                if other_var != variable and other_var not in assignment:
-                    for other_value in self.variables[other_var].domain:
-                        if not self.is_consistent(other_var, other_value, assignment):
-                            conflicts += 1
-            del assignment[variable]
-            return conflicts
-        return sorted(self.variables[variable].domain, key=count_conflicts)
+        """
+        Values of `variable` in the order to try them.
+
+        'lcv' (least constraining value) tries first the values that leave the
+        most options to the other variables, ties in domain order; 'domain'
+        skips the ranking and keeps domain order.
+        """
+        var = self.variables[variable]
+        positions = list(_positions(var.bits))
+        if self.value_order == "lcv":
+            remaining = self._remaining_values(variable, assignment)
+            positions.sort(key=lambda i: -remaining[i])
+        return [var.values[i] for i in positions]
 
     def _ac3(self):
         queue = deque([(xi, xj) for c in self.constraints if not c.is_soft for xi in c.variables for xj in c.variables if xi != xj])
         while queue:
             xi, xj = queue.popleft()
             if self._revise(xi, xj):
-                if not self.variables[xi].domain:
+                if not self.variables[xi].bits:
                     return False
                 for c in self.constraints:
                     if not c.is_soft and xi in c.variables:
@@ -179,41 +381,46 @@ class AgriculturalCSP:
         return True
 
     def _revise(self, xi, xj):
-        revised = False
-        values_to_remove = []
-        for x in self.variables[xi].domain:
-            consistent = False
-            for y in self.variables[xj].domain:
-                assignment = {xi: x, xj: y}
-                if all(c.is_satisfied(assignment) for c in self.constraints if not c.is_soft and set(c.variables).issubset({xi, xj})):
-                    consistent = True
+        # A value of xi survives if it passes xi's unary constraints and some
+        # remaining value of xj passes xj's and is compatible with it
+        self.revisions += 1
+        vi, vj = self.variables[xi], self.variables[xj]
+        candidates = vj.bits & self.unary_masks[xj]
+        supports = self._supports.get((xi, xj))
+        if supports is None:
+            supported = vi.full if candidates else 0
+        else:
+            wanted = vi.bits & self.unary_masks[xi]
+            supported = 0
+            for j in _positions(candidates):
+                supported |= supports[j]
+                if supported & wanted == wanted:
                     break
-            if not consistent:
-                values_to_remove.append(x)
-                revised = True
-        for x in values_to_remove:
-            self.variables[xi].domain.remove(x)
+        kept = vi.bits & self.unary_masks[xi] & supported
+        revised = kept != vi.bits
+        if revised:
+            self._domain_changed(xi, vi.bits ^ kept, -1)
+            vi.bits = kept
         return revised
 
     def _forward_check(self, var, assignment):
-        removals = defaultdict(list)
-        for other_var in self.variables:
-            if other_var != var and other_var not in assignment:
-                for value in list(self.variables[other_var].domain):
-                    if not self.is_consistent(other_var, value, assignment):
-                        self.variables[other_var].domain.remove(value)
-                        removals[other_var].append(value)
-                if not self.variables[other_var].domain:
+        removals = {}
+        for name, other in self.variables.items():
+            if name != var and name not in assignment:
+                removed = other.bits & ~self._allowed_values(name, assignment)
+                if removed:
+                    other.bits ^= removed
+                    removals[name] = removed
+                    self._domain_changed(name, removed, -1)
+                if not other.bits:
                     self._restore_domains(removals)
                     return None
         return removals
 
     def _restore_domains(self, removals):
-        for var, values in removals.items():
-            for value in values:
-                if value not in self.variables[var].domain:
-                    self.variables[var].domain.append(value)
-            self.variables[var].domain.sort()
+        for var, removed in removals.items():
+            self.variables[var].bits |= removed
+            self._domain_changed(var, removed, 1)
 
     def backtracking_search(self, max_iterations=1000):
         if not self._ac3():
@@ -226,6 +433,7 @@ class AgriculturalCSP:
     def _backtrack(self, assignment, iterations, max_iterations):
         if iterations >= max_iterations:
             return None
+        self.nodes_expanded += 1
         current_score = self._evaluate_assignment(assignment)
         if current_score > self.best_score:
             self.best_assignment = assignment.copy()
@@ -246,15 +454,19 @@ class AgriculturalCSP:
         return None
 
 class CSPSolver:
-    def __init__(self, initial_environment, crop_requirements, resource_limits):
+    def __init__(self, initial_environment, crop_requirements, resource_limits, value_order="lcv"):
         self.initial_environment = initial_environment
         self.crop_requirements = crop_requirements
         self.resource_limits = resource_limits
+        self.value_order = value_order
         self.feature_names = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
 
     def solve(self, max_iterations=1000):
-        csp = AgriculturalCSP(self.crop_requirements, self.initial_environment, self.resource_limits)
+        csp = AgriculturalCSP(self.crop_requirements, self.initial_environment, self.resource_limits, self.value_order)
         solution = csp.backtracking_search(max_iterations)
+        self.stats = {'nodes_expanded': csp.nodes_expanded, 'revisions': csp.revisions}
+        Metrics.inc("crop_csp_backtracks_total", csp.nodes_expanded)
+        Metrics.inc("crop_csp_revisions_total", csp.revisions)
         result = {
             'solution': solution,
             'crop': solution.get('Crop', 'None'),
@@ -299,25 +511,13 @@ class CSPSolver:
 
 def get_crop_requirements_csp(file_path=os.path.join(DATA_DIR, 'Crop_Data.csv')):
     try:
-        df = pd.read_csv(file_path)
-        if 'label' not in df.columns:
-            raise ValueError("Error: 'label' column not found in the CSV file.")
-        features = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
-        crop_stats = df.groupby('label')[features].agg(['min', 'max'])
-        crop_requirements = {}
-        for crop in crop_stats.index:
-            feature_ranges = {}
-            for feature in features:
-                min_val = crop_stats.loc[crop, (feature, 'min')]
-                max_val = crop_stats.loc[crop, (feature, 'max')]
-                feature_ranges[feature] = (round(min_val, 1), round(max_val, 1))
-            crop_requirements[crop] = feature_ranges
-        return crop_requirements
+        return get_knowledge_base(file_path).crop_requirements
     except Exception as e:
-        print(f"Error reading crop data: {e}")
+        logger.error("Error reading crop data: %s", e)
         return None
 
-def run_csp(initial_environment, crop_requirements=None, resource_limits=None, max_iterations=1000, visualize=True, mode="classify"):
+def run_csp(initial_environment, crop_requirements=None, resource_limits=None, max_iterations=1000, visualize=True, mode="classify",
+            value_order="lcv"):
     """
     Run the CSP solver for crop recommendation.
 
@@ -328,6 +528,8 @@ def run_csp(initial_environment, crop_requirements=None, resource_limits=None, m
         max_iterations: Maximum iterations for backtracking.
         visualize: Whether to generate visualizations.
         mode: 'predict' (return only the best crop with details) or 'classify' (top 5 crops with details and visualization).
+        value_order: 'lcv' (least constraining value first) or 'domain' (domain order, cheaper,
+            may settle on a different resource plan).
 
     Returns:
         dict: CSP result dictionary.
@@ -338,14 +540,14 @@ def run_csp(initial_environment, crop_requirements=None, resource_limits=None, m
     if crop_requirements is None:
         crop_requirements = get_crop_requirements_csp()
     if not crop_requirements:
-        print("Error: Failed to load crop requirements.")
+        logger.error("Failed to load crop requirements")
         return None
 
     if resource_limits is None:
-        resource_limits = {'fertilizer': 300, 'water': 300, 'organic_matter': 20}
+        resource_limits = dict(DEFAULT_RESOURCE_LIMITS)
 
 
-    solver = CSPSolver(initial_environment, crop_requirements, resource_limits)
+    solver = CSPSolver(initial_environment, crop_requirements, resource_limits, value_order)
     result = solver.solve(max_iterations)
 
     # Sort crops by suitability
@@ -0,0 +1,319 @@
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .Astar_Greedy import GraphSearch
+from .Genetic import GeneticAlgorithm
+from .CSP import run_csp
+from . import Metrics
+
+EXECUTOR_KINDS = ("process", "thread", "serial")
+
+
+# --- Engine entry points (module-level so they can run in worker processes) ---
+
+def run_search(problem, search_strategy="A*", state_key="quantized", **search_kwargs):
+    """Run GraphSearch and return (node, crop_or_list, cost, stats)."""
+    graph_search = GraphSearch(problem, state_key=state_key)
+    node, crop_or_list, cost = graph_search.search(search_strategy, **search_kwargs)
+    return node, crop_or_list, cost, graph_search.stats
+
+
+def search_completed(value):
+    """Whether a run_search result came from a full search (not one cut short by its node budget or time limit)."""
+    return not value[3].get('truncated')
+
+
+def run_genetic(problem, mode="predict", **ga_kwargs):
+    """Run the GA and return (best_solution, best_fitness, best_crop, top_crops)."""
+    ga = GeneticAlgorithm(problem, **ga_kwargs)
+    return ga.solve(mode)
+
+
+def run_constraint_solver(environment, knowledge_base=None, **csp_kwargs):
+    """
+    Run the CSP solver and return its result dictionary. `knowledge_base`
+    supplies the crop requirements; unlike the requirements themselves it
+    pickles as its file path, so it is cheap to send to a worker.
+    """
+    if knowledge_base is not None:
+        csp_kwargs['crop_requirements'] = knowledge_base.crop_requirements
+    return run_csp(environment, **csp_kwargs)
+
+
+class EngineOutcome:
+    """Result of one engine run: either a value or the error it failed with."""
+    def __init__(self, name, value=None, error=None, elapsed=0.0, cached=False):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+        self.cached = cached
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def result(self):
+        """Return the engine's value, re-raising its error if it failed."""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"error={self.error!r}"
+        if self.cached:
+            status += ", cached"
+        return f"EngineOutcome({self.name}, {status}, elapsed={self.elapsed:.3f}s)"
+
+
+class EngineTimeoutError(TimeoutError):
+    """Raised (through EngineOutcome.result) when an engine misses its timeout."""
+
+
+def _run_captured(function, args, kwargs):
+    # Pool entry point: metrics recorded by the engine travel back with its value
+    with Metrics.capture_metrics() as captured:
+        value = function(*args, **kwargs)
+    return value, captured.snapshot()
+
+
+def _run_pickled(payload):
+    # Process pool entry point. The job is unpickled here rather than by the
+    # pool, so an argument that can't be restored in the worker (e.g. a
+    # knowledge base whose CSV changed) fails this job instead of killing the
+    # worker and breaking the pool.
+    return _run_captured(*pickle.loads(payload))
+
+
+def _observe_outcome(outcome):
+    if outcome.cached:
+        status = "cached"
+    elif outcome.ok:
+        status = "ok"
+    else:
+        status = "timeout" if isinstance(outcome.error, EngineTimeoutError) else "error"
+    Metrics.inc("crop_engine_runs_total", engine=outcome.name, outcome=status)
+    if not outcome.cached:
+        Metrics.observe("crop_engine_duration_seconds", outcome.elapsed, engine=outcome.name)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(kind, max_workers=None, name="engines"):
+    # Pools are keyed by pid so a forked worker never reuses its parent's pool,
+    # and by name so nested runs (e.g. GA islands inside an engine job) can't
+    # deadlock waiting on their own saturated pool.
+    key = (kind, name, os.getpid())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            max_workers = max_workers or min(4, os.cpu_count() or 1)
+            if kind == "process":
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+            else:
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+            _pools[key] = pool
+        return pool
+
+
+def _discard_pool(kind, name="engines", cancel_futures=True):
+    # Later calls get a fresh pool; the old one exits once its running work is
+    # done (queued work too, unless cancel_futures)
+    with _pools_lock:
+        pool = _pools.pop((kind, name, os.getpid()), None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=cancel_futures)
+
+
+def shutdown_pools():
+    """Shut down the shared worker pools (they are recreated on demand)."""
+    for kind, name, pid in list(_pools):
+        if pid == os.getpid():
+            _discard_pool(kind, name)
+
+
+def run_engines(jobs, executor="process", timeout=None, timeouts=None, max_workers=None, pool_name="engines",
+                cache=None, cache_keys=None, on_outcome=None, record_metrics=True, executors=None, cacheable=None):
+    """
+    Run several engines concurrently and collect their outcomes.
+
+    Parameters:
+    -----------
+    jobs : dict
+        {name: (function, args, kwargs)}; functions must be picklable
+        (module-level) when executor is "process".
+    executor : str
+        "process" (default, for the CPU-bound engines), "thread", or "serial"
+        to run them one after another in the calling thread. Inside a
+        worker process "process" falls back to "serial".
+    executors : dict, optional
+        Per-engine overrides of `executor` ("process" or "thread"; ignored
+        when running serially). E.g. {'genetic': 'thread'} keeps a GA with
+        islands in this process, where it can run the islands on a process
+        pool of its own instead of one after another in a worker.
+    timeout : float, optional
+        Default number of seconds each engine may take, counted from
+        submission (so time spent queued for a worker counts too). A
+        running engine can't be interrupted: on a timeout its worker is
+        left to finish in the background and the shared pool is replaced,
+        so later calls don't queue behind it. Engines with their own limit
+        (e.g. the search's `time_limit`) should get one below this.
+    timeouts : dict, optional
+        Per-engine overrides of `timeout`.
+    pool_name : str
+        Which shared pool to use; nested callers pass their own name.
+    cache : ResultCache, optional
+        Engines whose key (see `make_cache_key`) is found in the cache are not
+        run; their outcome has `cached=True`. Successful runs are stored.
+    cache_keys : dict, optional
+        {name: cache key}; engines without a key bypass the cache.
+    cacheable : dict, optional
+        {name: predicate(value)}; values the predicate rejects (e.g. a
+        search cut short under load, see `search_completed`) are returned
+        but not stored.
+    on_outcome : callable, optional
+        Called with each EngineOutcome as soon as that engine finishes (or
+        fails, or times out), so callers can report partial results.
+    record_metrics : bool
+        Count each outcome and its latency per engine in the metrics
+        registry. Metrics the engines record themselves are collected
+        from the workers either way.
+
+    Returns:
+    --------
+    dict of {name: EngineOutcome}. A failing or timed-out engine never
+    affects the others; its outcome carries the error instead of a value.
+    """
+    executors = executors or {}
+    for kind in [executor, *executors.values()]:
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor '{kind}', expected one of {EXECUTOR_KINDS}")
+    if multiprocessing.parent_process() is not None:
+        # Already inside a worker process: nested process pools can't be shut
+        # down cleanly, so run the jobs in this process instead.
+        if executor == "process":
+            executor = "serial"
+        executors = {name: kind for name, kind in executors.items() if kind != "process"}
+    timeouts = timeouts or {}
+    outcomes = {}
+
+    def _record(outcome, observe=record_metrics):
+        outcomes[outcome.name] = outcome
+        if observe:
+            _observe_outcome(outcome)
+        if on_outcome is not None:
+            on_outcome(outcome)
+
+    if cache is not None and cache_keys:
+        for name in jobs:
+            key = cache_keys.get(name)
+            if key is None:
+                continue
+            start = time.perf_counter()
+            value = cache.get(key, engine=name)
+            if value is not None:
+                _record(EngineOutcome(name, value=value, elapsed=time.perf_counter() - start, cached=True))
+
+        def _store(outcome):
+            key = cache_keys.get(outcome.name)
+            accept = (cacheable or {}).get(outcome.name)
+            if key is not None and outcome.ok and (accept is None or accept(outcome.value)):
+                cache.set(key, outcome.value)
+            # Already counted by the nested run
+            _record(outcome, observe=False)
+
+        pending = {name: job for name, job in jobs.items() if name not in outcomes}
+        if pending:
+            run_engines(pending, executor, timeout, timeouts, max_workers, pool_name, on_outcome=_store,
+                        record_metrics=record_metrics, executors=executors)
+        return {name: outcomes[name] for name in jobs}
+
+    if executor == "serial":
+        for name, (function, args, kwargs) in jobs.items():
+            start = time.perf_counter()
+            try:
+                value = function(*args, **kwargs)
+                _record(EngineOutcome(name, value=value, elapsed=time.perf_counter() - start))
+            except Exception as e:
+                _record(EngineOutcome(name, error=e, elapsed=time.perf_counter() - start))
+        return outcomes
+
+    kinds = {name: executors.get(name, executor) for name in jobs}
+    if "serial" in kinds.values():
+        raise ValueError("Per-engine executors can't mix 'serial' with pools")
+    start = time.perf_counter()
+    futures = {}
+    try:
+        for name, (function, args, kwargs) in jobs.items():
+            pool = _get_pool(kinds[name], max_workers, pool_name)
+            if kinds[name] != "process":
+                futures[pool.submit(_run_captured, function, args, kwargs)] = name
+                continue
+            try:
+                payload = pickle.dumps((function, args, kwargs))
+            except Exception as e:
+                _record(EngineOutcome(name, error=e))
+                continue
+            futures[pool.submit(_run_pickled, payload)] = name
+    except (BrokenProcessPool, RuntimeError) as e:
+        for kind in set(kinds.values()):
+            _discard_pool(kind, pool_name)
+        for future in futures:
+            future.cancel()
+        for name in jobs:
+            if name not in outcomes:
+                _record(EngineOutcome(name, error=e))
+        return {name: outcomes[name] for name in jobs}
+
+    deadlines = {}
+    for name in jobs:
+        limit = timeouts.get(name, timeout)
+        if limit is not None:
+            deadlines[name] = (start + limit, limit)
+
+    # Collect outcomes in completion order, expiring engines at their own deadline
+    broken = set()
+    stuck = set()
+    not_done = set(futures)
+    while not_done:
+        pending_deadlines = [deadlines[futures[f]][0] for f in not_done if futures[f] in deadlines]
+        wait_for = max(0.0, min(pending_deadlines) - time.perf_counter()) if pending_deadlines else None
+        done, not_done = wait(not_done, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                value, captured = future.result()
+                Metrics.merge(captured)
+                _record(EngineOutcome(name, value=value, elapsed=time.perf_counter() - start))
+            except BrokenProcessPool as e:
+                broken.add(kinds[name])
+                _record(EngineOutcome(name, error=e, elapsed=time.perf_counter() - start))
+            except Exception as e:
+                _record(EngineOutcome(name, error=e, elapsed=time.perf_counter() - start))
+        now = time.perf_counter()
+        for future in list(not_done):
+            name = futures[future]
+            if name in deadlines and deadlines[name][0] <= now:
+                # cancel() only succeeds while the job is still queued
+                if not future.cancel():
+                    stuck.add(kinds[name])
+                not_done.discard(future)
+                _record(EngineOutcome(
+                    name, error=EngineTimeoutError(f"{name} did not finish within {deadlines[name][1]}s"),
+                    elapsed=now - start))
+
+    for kind in broken:
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        _discard_pool(kind, pool_name)
+    for kind in stuck - broken:
+        # A timed-out engine still holds a worker. Other callers' queued jobs
+        # stay on the old pool and finish there.
+        _discard_pool(kind, pool_name, cancel_futures=False)
+    return {name: outcomes[name] for name in jobs}
@@ -0,0 +1,253 @@
+"""
+Recommendation quality versus cost of the engines on the labeled dataset.
+
+    python -m AI_engine.Evaluation -o evaluation.json
+    python -m AI_engine.Evaluation --dataset data/Crop_recommendationV2.csv --max-depth 2,3,4 --generations 20,50
+
+Every labeled row is replayed through each engine configuration on a process
+pool. Per configuration the report gives how often the engine's first
+recommendation (top-1) or one of its first five (top-5) is the row's label,
+next to per-sample latency percentiles measured inside the workers.
+
+Comma-separated values of --max-depth, --population-size, --generations and
+--max-iterations are swept: one A*/Greedy configuration per depth, one GA
+configuration per (population size, generations) pair and one CSP
+configuration per iteration limit.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .Knowledge_base import DEFAULT_DATA_FILE, FEATURES, get_knowledge_base
+from .Problem_definition import CropPredictionProblem, CropState
+from .Engine_runner import run_search, run_genetic, run_constraint_solver, _get_pool
+
+ENGINES = ("astar", "greedy", "genetic", "csp")
+SEARCH_STRATEGIES = {'astar': "A*", 'greedy': "Greedy_search"}
+TOP_N = 5
+
+
+def load_labeled_rows(path=DEFAULT_DATA_FILE, limit=None):
+    """[(row_index, label, environment)] for every row of a CSV with the seven features and `label`."""
+    df = pd.read_csv(path)
+    missing = [column for column in list(FEATURES) + ['label'] if column not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}")
+    if limit is not None:
+        df = df.head(limit)
+    return [(int(index), label, [float(v) for v in values])
+            for index, label, values in zip(df.index, df['label'], df[list(FEATURES)].to_numpy())]
+
+
+def build_variants(engines=ENGINES, max_depths=(4,), max_nodes=20000, population_sizes=(30,), generations=(50,),
+                   max_iterations=(1000,), seed=0):
+    """
+    Engine configurations to evaluate, as [(name, engine, params)], e.g.
+    ('astar[max_depth=3]', 'astar', {'max_depth': 3, 'max_nodes': 20000}).
+    """
+    variants = []
+    for engine in engines:
+        if engine in SEARCH_STRATEGIES:
+            for depth in max_depths:
+                variants.append((f"{engine}[max_depth={depth}]", engine, {'max_depth': depth, 'max_nodes': max_nodes}))
+        elif engine == "genetic":
+            for size, count in itertools.product(population_sizes, generations):
+                variants.append((f"genetic[population_size={size},generations={count}]", engine,
+                                 {'population_size': size, 'generations': count, 'seed': seed}))
+        elif engine == "csp":
+            for limit in max_iterations:
+                variants.append((f"csp[max_iterations={limit}]", engine, {'max_iterations': limit}))
+        else:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+    return variants
+
+
+def ranked_crops(engine, value):
+    """The engine's recommendations for one input, best first (at most TOP_N)."""
+    if engine in SEARCH_STRATEGIES:
+        _, crop_or_list, _, _ = value
+        if isinstance(crop_or_list, str):
+            return [crop_or_list]
+        return [crop for crop, *_ in crop_or_list or []][:TOP_N]
+    if engine == "genetic":
+        _, _, best_crop, top_crops = value
+        ranked = [best_crop] if best_crop else []
+        ranked += [crop for crop, _ in top_crops if crop != best_crop]
+        return ranked[:TOP_N]
+    if not value:
+        return []
+    # CSP: crops by suitability of the solved environment, as the result pages rank them
+    ranked = sorted(value.get('alternative_crops', {}).items(), key=lambda x: x[1]['percentage'], reverse=True)
+    return [crop for crop, _ in ranked[:TOP_N]]
+
+
+def _run_variant(engine, params, environment, mode, data_file):
+    if engine in SEARCH_STRATEGIES:
+        problem = CropPredictionProblem(CropState(environment), data_file)
+        return run_search(problem, SEARCH_STRATEGIES[engine], **params)
+    if engine == "genetic":
+        problem = CropPredictionProblem(CropState(environment), data_file)
+        return run_genetic(problem, mode, **params)
+    crop_requirements = get_knowledge_base(data_file).crop_requirements
+    return run_constraint_solver(environment, crop_requirements=crop_requirements, **params)
+
+
+def evaluate_rows(rows, variants, mode="classify", data_file=None):
+    """
+    Run every variant on every (row_index, label, environment) in this
+    process and return one record per (row, variant):
+    {'row', 'variant', 'top1', 'top5', 'latency_s', 'prediction'} or, for a
+    failed run, {'row', 'variant', 'latency_s', 'error'}.
+    """
+    records = []
+    # Engine progress messages from thousands of runs would drown the output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for index, label, environment in rows:
+            for name, engine, params in variants:
+                start = time.perf_counter()
+                try:
+                    ranked = ranked_crops(engine, _run_variant(engine, params, environment, mode, data_file))
+                except Exception as e:
+                    records.append({'row': index, 'variant': name, 'latency_s': time.perf_counter() - start,
+                                    'error': str(e)})
+                    continue
+                records.append({
+                    'row': index,
+                    'variant': name,
+                    'top1': bool(ranked) and ranked[0] == label,
+                    'top5': label in ranked,
+                    'latency_s': time.perf_counter() - start,
+                    'prediction': ranked[0] if ranked else None,
+                })
+    return records
+
+
+def evaluate(rows, variants, mode="classify", max_workers=None, chunk_size=25, data_file=None, executor="process"):
+    """
+    Evaluate `rows` in chunks of `chunk_size` on a process pool, yielding
+    each chunk's records (see `evaluate_rows`) in input order. executor
+    "serial" evaluates in this process (as does "process" inside a worker).
+    """
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    work = partial(evaluate_rows, variants=variants, mode=mode, data_file=data_file)
+    if executor == "process" and multiprocessing.parent_process() is not None:
+        executor = "serial"
+    if executor == "serial":
+        yield from map(work, chunks)
+        return
+    pool = _get_pool("process", max_workers, "evaluation")
+    yield from pool.map(work, chunks)
+
+
+def _percentiles(latencies):
+    array = np.asarray(latencies, dtype=float) * 1000
+    return {
+        'latency_mean_ms': float(array.mean()),
+        'latency_p50_ms': float(np.percentile(array, 50)),
+        'latency_p90_ms': float(np.percentile(array, 90)),
+        'latency_p99_ms': float(np.percentile(array, 99)),
+        'latency_max_ms': float(array.max()),
+    }
+
+
+def summarize(records, variants):
+    """Per-variant agreement rates and latency percentiles, in `variants` order."""
+    summary = {}
+    for name, engine, params in variants:
+        runs = [record for record in records if record['variant'] == name]
+        ok = [record for record in runs if 'error' not in record]
+        entry = {'engine': engine, 'params': params, 'samples': len(runs), 'errors': len(runs) - len(ok)}
+        if ok:
+            entry['top1_agreement'] = sum(record['top1'] for record in ok) / len(ok)
+            entry['top5_agreement'] = sum(record['top5'] for record in ok) / len(ok)
+            entry.update(_percentiles([record['latency_s'] for record in ok]))
+            # Samples one worker gets through per second with this configuration
+            entry['samples_per_second'] = 1000 / entry['latency_mean_ms'] if entry['latency_mean_ms'] else None
+        summary[name] = entry
+    return summary
+
+
+def format_summary(summary):
+    """Plain-text table of the per-variant results."""
+    width = max([len(name) for name in summary] + [7])
+    lines = [f"{'variant':<{width}} {'n':>5} {'err':>4} {'top1':>6} {'top5':>6} {'p50 ms':>8} {'p90 ms':>8} "
+             f"{'p99 ms':>8}"]
+    for name, entry in summary.items():
+        if 'top1_agreement' not in entry:
+            lines.append(f"{name:<{width}} {entry['samples']:>5} {entry['errors']:>4}")
+            continue
+        lines.append(f"{name:<{width}} {entry['samples']:>5} {entry['errors']:>4} {entry['top1_agreement']:>6.1%} "
+                     f"{entry['top5_agreement']:>6.1%} {entry['latency_p50_ms']:>8.2f} {entry['latency_p90_ms']:>8.2f} "
+                     f"{entry['latency_p99_ms']:>8.2f}")
+    return "\n".join(lines)
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure label agreement and latency of the crop engines.")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--dataset", action="append", default=None,
+                        help="labeled CSV to replay; repeat for several (default: data/Crop_Data.csv)")
+    parser.add_argument("--data-file", default=None, help="crop dataset the engines use (default: data/Crop_Data.csv)")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N rows of each dataset")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"comma-separated subset of {','.join(ENGINES)}")
+    parser.add_argument("--mode", choices=("predict", "classify"), default="classify")
+    parser.add_argument("--max-depth", type=_int_list, default=[4], help="A*/Greedy depth(s), e.g. 2,3,4")
+    parser.add_argument("--max-nodes", type=int, default=20000, help="A*/Greedy node budget")
+    parser.add_argument("--population-size", type=_int_list, default=[30], help="GA population size(s)")
+    parser.add_argument("--generations", type=_int_list, default=[50], help="GA generation count(s)")
+    parser.add_argument("--max-iterations", type=_int_list, default=[1000], help="CSP iteration limit(s)")
+    parser.add_argument("--seed", type=int, default=0, help="GA seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: min(4, CPUs))")
+    parser.add_argument("--chunk-size", type=int, default=25, help="rows per task sent to a worker")
+    args = parser.parse_args(argv)
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    variants = build_variants(engines, args.max_depth, args.max_nodes, args.population_size, args.generations,
+                              args.max_iterations, args.seed)
+    report = {'mode': args.mode, 'knowledge_base': get_knowledge_base(args.data_file).version, 'datasets': {}}
+
+    for path in args.dataset or [DEFAULT_DATA_FILE]:
+        rows = load_labeled_rows(path, args.limit)
+        print(f"{path}: {len(rows)} rows x {len(variants)} configurations", file=sys.stderr)
+        records = []
+        start = time.perf_counter()
+        for chunk in evaluate(rows, variants, args.mode, args.workers, args.chunk_size, args.data_file):
+            records.extend(chunk)
+            done = len(records) // len(variants)
+            if done % (args.chunk_size * 20) < args.chunk_size or done == len(rows):
+                print(f"  {done}/{len(rows)} rows", file=sys.stderr)
+        wall_time = time.perf_counter() - start
+
+        summary = summarize(records, variants)
+        report['datasets'][path] = {
+            'rows': len(rows),
+            'wall_time_s': wall_time,
+            'rows_per_second': len(rows) / wall_time if wall_time else None,
+            'variants': summary,
+        }
+        print(format_summary(summary), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,150 @@
+import logging
 import random
 import copy
+import json
+from collections import OrderedDict
 from AI_engine.NodeClass import Node
 from .Problem_definition import CropPredictionProblem , CropState
+from . import Metrics
+from .Log_config import get_logger
+
+logger = get_logger(__name__)
+
+class FitnessCache:
+    """Bounded LRU cache of (fitness, crop) results keyed by chromosome."""
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chromosome, evaluate):
+        """Return the cached result for `chromosome`, computing it with `evaluate` on a miss."""
+        key = tuple(chromosome)
+        try:
+            result = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            result = evaluate(chromosome)
+            self._entries[key] = result
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return result
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+
+    def get_many(self, chromosomes, evaluate_many):
+        """
+        Cached results for a list of chromosomes; all misses are computed in a
+        single `evaluate_many(list_of_chromosomes)` call.
+        """
+        results = [None] * len(chromosomes)
+        missing = OrderedDict()  # key -> positions in `chromosomes`
+        for i, chromosome in enumerate(chromosomes):
+            key = tuple(chromosome)
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                results[i] = self._entries[key]
+            elif key in missing:
+                self.hits += 1
+                missing[key].append(i)
+            else:
+                self.misses += 1
+                missing[key] = [i]
+
+        if missing:
+            values = evaluate_many([list(key) for key in missing])
+            for (key, positions), value in zip(missing.items(), values):
+                self._entries[key] = value
+                for i in positions:
+                    results[i] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return results
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+        }
 
 class GeneticAlgorithm:
     """Genetic Algorithm for crop intervention optimization."""
-    def __init__(self, problem, population_size=30, generations=50, mutation_rate=0.2, tournament_size=3):
-        """Initialize GA."""
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, problem, population_size=30, generations=50, mutation_rate=0.2, tournament_size=3, cache_size=4096,
+                 islands=1, migration_interval=5, migration_size=2, island_executor="process",
+                 seed=None, checkpoint_path=None, checkpoint_interval=10):
+        """
+        Initialize GA.
+
+        All randomness comes from a per-instance generator seeded with `seed`,
+        so two runs with the same seed and input give the same result. When
+        `checkpoint_path` is set, solve() writes a checkpoint there every
+        `checkpoint_interval` generations and when it finishes.
+
+        With islands > 1, solve() runs the island model: `islands`
+        sub-populations of `population_size` evolve in parallel workers
+        (`island_executor`: "process", "thread" or "serial") and the
+        `migration_size` best individuals of each island replace the worst of
+        the next one (ring topology) every `migration_interval` generations.
+        Island runs are seeded too but are not checkpointed. A GA that itself
+        runs in a worker process evolves its islands one after another, so
+        callers with a process pool run it on a thread instead (see the
+        `executors` option of run_engines).
+        """
         self.problem = problem
         self.population_size = population_size
         self.generations = generations
         self.mutation_rate = mutation_rate
         self.tournament_size = tournament_size
+        self.cache_size = cache_size
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.island_executor = island_executor
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self._state = None
+        self.generations_run = 0
+        # Genes are rounded to one decimal, so the same chromosome is scored many times per run
+        self.fitness_cache = FitnessCache(cache_size)
+
+    def fitness(self, chromosome):
+        """(fitness, crop) of a chromosome, memoized across selection, elitism and solve."""
+        return self.fitness_cache.get(chromosome, self.problem.evaluate)
+
+    def evaluate_population(self, population):
+        """(fitness, crop) for every individual, scoring uncached ones in one vectorized batch."""
+        return self.fitness_cache.get_many(population, self._evaluate_batch)
+
+    def _evaluate_batch(self, chromosomes):
+        if not hasattr(self.problem, 'evaluate_population'):
+            return [self.problem.evaluate(c) for c in chromosomes]
+        fitness, closest = self.problem.evaluate_population(chromosomes)
+        names = self.problem.knowledge_base.profile_names
+        return [(float(f), names[i] if i >= 0 else "unknown") for f, i in zip(fitness, closest)]
+
+    @property
+    def cache_stats(self):
+        return self.fitness_cache.stats
 
     def initialize_population(self):
         """Generate logical random population with zero-action chromosomes."""
-        print("Initializing GA population...")
+        logger.debug("Initializing GA population")
         population = []
 
         # Check if problem has interventions defined
         if not hasattr(self.problem, 'interventions') or not self.problem.interventions:
-            print("Warning: Problem has no interventions defined")
+            logger.warning("Problem has no interventions defined")
             return []
 
         # Generate remaining chromosomes
@@ -29,22 +153,22 @@ class GeneticAlgorithm:
             for i, (intervention_name, (min_val, max_val)) in enumerate(self.problem.interventions):
                 try:
                     # 10% chance for zero value (except irrigation_frequency)
-                    if random.random() < 0.1 and min_val == 0:
+                    if self.rng.random() < 0.1 and min_val == 0:
                         value = 0
                     else:
                         if min_val == 3:  # irrigation_frequency
-                            value = random.randint(int(min_val), int(max_val))
+                            value = self.rng.randint(int(min_val), int(max_val))
                         else:
-                            value = round(random.uniform(min_val, max_val), 1)  # One decimal place
+                            value = round(self.rng.uniform(min_val, max_val), 1)  # One decimal place
                     chromosome.append(value)
                 except Exception as e:
-                    print(f"Error initializing intervention {intervention_name}: {e}")
+                    logger.error("Error initializing intervention %s: %s", intervention_name, e)
                     chromosome.append(min_val)  # Default to minimum value
             
             if chromosome:  # Only add if we have valid chromosome
                 population.append(chromosome)
         
-        print(f"Generated population of size: {len(population)}")
+        logger.debug("Generated population of size: %d", len(population))
         return population
 
     def select_parent(self, population):
@@ -52,20 +176,20 @@ class GeneticAlgorithm:
         if len(population) < self.tournament_size:
             tournament = population.copy()
         else:
-            tournament = random.sample(population, self.tournament_size)
+            tournament = self.rng.sample(population, self.tournament_size)
         
         try:
-            return max(tournament, key=lambda x: self.problem.evaluate(x)[0])
+            return max(tournament, key=lambda x: self.fitness(x)[0])
         except Exception as e:
-            print(f"Error in parent selection: {e}")
-            return random.choice(tournament)
+            logger.error("Error in parent selection: %s", e)
+            return self.rng.choice(tournament)
 
     def crossover(self, parent1, parent2):
         """Blend crossover."""
         child = []
         try:
             for p1, p2, (_, (min_val, max_val)) in zip(parent1, parent2, self.problem.interventions):
-                alpha = random.uniform(0, 1)
+                alpha = self.rng.uniform(0, 1)
                 value = alpha * p1 + (1 - alpha) * p2
                 value = max(min_val, min(max_val, value))
                 if min_val == 3:  # irrigation_frequency
@@ -74,7 +198,7 @@ class GeneticAlgorithm:
                     value = round(value, 1)  # One decimal place
                 child.append(value)
         except Exception as e:
-            print(f"Error in crossover: {e}")
+            logger.error("Error in crossover: %s", e)
             # Return one of the parents as fallback
             return parent1.copy()
         
@@ -84,11 +208,11 @@ class GeneticAlgorithm:
         """Mutate one gene."""
         individual = copy.deepcopy(individual)
         try:
-            if random.random() < self.mutation_rate:
-                idx = random.randint(0, len(individual) - 1)
+            if self.rng.random() < self.mutation_rate:
+                idx = self.rng.randint(0, len(individual) - 1)
                 min_val, max_val = self.problem.interventions[idx][1]
                 delta = 0.1 * (max_val - min_val)
-                value = individual[idx] + random.uniform(-delta, delta)
+                value = individual[idx] + self.rng.uniform(-delta, delta)
                 value = max(min_val, min(max_val, value))
                 if min_val == 3:  # irrigation_frequency
                     value = round(value)
@@ -96,7 +220,7 @@ class GeneticAlgorithm:
                     value = round(value, 1)  # One decimal place
                 individual[idx] = value
         except Exception as e:
-            print(f"Error in mutation: {e}")
+            logger.error("Error in mutation: %s", e)
             # Return original individual if mutation fails
         
         return individual
@@ -107,8 +231,9 @@ class GeneticAlgorithm:
             return []
             
         try:
-            # Keep the best individual
-            best = max(population, key=lambda x: self.problem.evaluate(x)[0])
+            # Keep the best individual (scoring the whole generation in one batch)
+            scores = self.evaluate_population(population)
+            best = population[max(range(len(population)), key=lambda i: scores[i][0])]
             new_population = [copy.deepcopy(best)]
             
             while len(new_population) < self.population_size:
@@ -119,34 +244,60 @@ class GeneticAlgorithm:
                     child = self.perform_mutation(child)
                     new_population.append(child)
                 except Exception as e:
-                    print(f"Error creating offspring: {e}")
+                    logger.error("Error creating offspring: %s", e)
                     # Add a random parent as fallback
                     if population:
-                        new_population.append(copy.deepcopy(random.choice(population)))
+                        new_population.append(copy.deepcopy(self.rng.choice(population)))
                     
         except Exception as e:
-            print(f"Error in population evolution: {e}")
+            logger.error("Error in population evolution: %s", e)
             return population  # Return original population if evolution fails
         
         return new_population
 
-    def solve(self, mode="classify"):
-        """Run GA."""
+    def solve(self, mode="classify", initial_population=None, resume_from=None):
+        """
+        Run GA.
+
+        initial_population warm-starts the run from chromosomes of an earlier
+        run (e.g. the same or a nearby farm profile); it is trimmed or topped
+        up with random chromosomes to `population_size`. resume_from continues
+        an interrupted run from a checkpoint dict or file.
+        """
         
         # Check if problem has required methods
         if not hasattr(self.problem, 'evaluate'):
             raise ValueError("Problem must have an 'evaluate' method")
-            
-        population = self.initialize_population()
+
+        if self.islands > 1:
+            return self._solve_islands(mode, initial_population)
+
+        if resume_from is not None:
+            state = resume_from if isinstance(resume_from, dict) else self.load_checkpoint(resume_from)
+            self.restore_checkpoint(state)
+            population = [list(c) for c in state['population']]
+            best_solution = list(state['best_solution']) if state['best_solution'] is not None else None
+            best_fitness = state['best_fitness'] if state['best_fitness'] is not None else -float('inf')
+            best_crop = state['best_crop']
+            no_improvement = state['no_improvement']
+            start_generation = state['generation']
+            stopped = state.get('stopped', False)
+        else:
+            population = self._starting_population(initial_population)
+            best_solution = None
+            best_fitness = -float('inf')
+            best_crop = None
+            no_improvement = 0
+            start_generation = 0
+            stopped = False
+
         if not population:
             raise ValueError("Failed to initialize population")
-            
-        best_solution = None
-        best_fitness = -float('inf')
-        best_crop = None
-        no_improvement = 0
-        
-        for generation in range(self.generations):
+
+        self.generations_run = 0
+        for generation in range(start_generation, self.generations):
+            if stopped:
+                break
             try:
                 population = self.evolve_population(population)
                 if not population:
@@ -156,26 +307,26 @@ class GeneticAlgorithm:
                 # and select the best one based on fitness
                 current_best = None
                 current_fitness = -float('inf')
+                scores = self.evaluate_population(population)
                 
-                for individual in population:
+                for individual, (fitness, crop) in zip(population, scores):
                     try:
-                        fitness, crop = self.problem.evaluate(individual)
                         if fitness > current_fitness:
                             current_fitness = fitness
                             current_best = individual
                     except Exception as e:
-                        print(f"Error evaluating individual: {e}")
+                        logger.error("Error evaluating individual: %s", e)
                         continue
 
                 if current_best is None:
-                    print(f"No valid individuals found in generation {generation}")
+                    logger.warning("No valid individuals found in generation %d", generation)
                     continue
                     
                 # Get the crop for the current best
                 try:
-                    current_fitness, current_crop = self.problem.evaluate(current_best)
+                    current_fitness, current_crop = self.fitness(current_best)
                 except Exception as e:
-                    print(f"Error getting crop for best solution: {e}")
+                    logger.error("Error getting crop for best solution: %s", e)
                     current_crop = "Unknown"
 
                 # Update the best solution, fitness, and crop if the current solution is better
@@ -188,16 +339,89 @@ class GeneticAlgorithm:
                     no_improvement += 1
                     
                 if generation % 10 == 0:
-                    print(f"Generation {generation}: Fitness = {best_fitness:.4f}, Crop = {best_crop}")
+                    logger.debug("Generation %d: Fitness = %.4f, Crop = %s", generation, best_fitness, best_crop)
                     
                 if no_improvement >= 10:
-                    print(f"Early stopping at generation {generation}")
-                    break
+                    logger.debug("Early stopping at generation %d", generation)
+                    stopped = True
                     
             except Exception as e:
-                print(f"Error in generation {generation}: {e}")
+                logger.error("Error in generation %d: %s", generation, e)
                 continue
 
+            finally:
+                self.generations_run += 1
+                self._record_state(generation + 1, population, best_solution, best_fitness, best_crop,
+                                   no_improvement, stopped)
+
+        if self.checkpoint_path and self._state is not None:
+            self.save_checkpoint(self.checkpoint_path)
+
+        return self._finalize(best_solution, best_fitness, best_crop, mode)
+
+    def _starting_population(self, initial_population=None):
+        """Random population, or a warm start trimmed/topped up to population_size."""
+        if not initial_population:
+            return self.initialize_population()
+        population = [list(c) for c in initial_population[:self.population_size]]
+        missing = self.population_size - len(population)
+        if missing > 0:
+            population.extend(self.initialize_population()[:missing])
+        return population
+
+    def _record_state(self, generation, population, best_solution, best_fitness, best_crop, no_improvement, stopped):
+        self._state = {
+            'version': self.CHECKPOINT_VERSION,
+            'generation': generation,
+            'population': [list(c) for c in population],
+            'best_solution': list(best_solution) if best_solution is not None else None,
+            'best_fitness': best_fitness if best_solution is not None else None,
+            'best_crop': best_crop,
+            'no_improvement': no_improvement,
+            'stopped': stopped,
+            'seed': self.seed,
+            'rng_state': self.rng.getstate(),
+        }
+        if self.checkpoint_path and self.checkpoint_interval and generation % self.checkpoint_interval == 0:
+            self.save_checkpoint(self.checkpoint_path)
+
+    def checkpoint(self):
+        """Snapshot of the last completed generation (population, best solution, counter, RNG state)."""
+        if self._state is None:
+            raise ValueError("No generation has completed yet")
+        return copy.deepcopy(self._state)
+
+    def restore_checkpoint(self, state):
+        """Restore the RNG from a checkpoint so a resumed run continues the same random sequence."""
+        if state.get('version') != self.CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {state.get('version')}")
+        self.seed = state.get('seed')
+        self.rng.setstate(state['rng_state'])
+        self._state = copy.deepcopy(state)
+
+    def save_checkpoint(self, path):
+        """Write the latest checkpoint to `path` as JSON."""
+        state = self.checkpoint()
+        version, internal_state, gauss_next = state['rng_state']
+        state['rng_state'] = [version, list(internal_state), gauss_next]
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @staticmethod
+    def load_checkpoint(path):
+        """Read a checkpoint written by save_checkpoint()."""
+        with open(path) as f:
+            state = json.load(f)
+        version, internal_state, gauss_next = state['rng_state']
+        state['rng_state'] = (version, tuple(internal_state), gauss_next)
+        return state
+
+
+    def _finalize(self, best_solution, best_fitness, best_crop, mode):
+        """Rank crops for the best solution and build solve()'s return value."""
+        Metrics.inc("crop_ga_generations_total", self.generations_run)
+        Metrics.inc("crop_ga_fitness_evaluations_total", self.fitness_cache.misses)
+        Metrics.inc("crop_ga_fitness_cache_hits_total", self.fitness_cache.hits)
         if best_solution is None:
             raise ValueError("GA failed to find any valid solution")
 
@@ -209,23 +433,121 @@ class GeneticAlgorithm:
                 # Sort crops by suitability in descending order and select the top 5
                 top_crops = sorted(suitability_scores.items(), key=lambda x: x[1], reverse=True)[:5]
             else:
-                print("Warning: Problem does not have compute_all_suitability method")
+                logger.warning("Problem does not have compute_all_suitability method")
         except Exception as e:
-            print(f"Error computing suitability scores: {e}")
+            logger.error("Error computing suitability scores: %s", e)
 
-        # Print results based on the specified mode
-        print(f"\nGA Best Solution: Fitness = {best_fitness:.4f}")
-        
-        # Create a dictionary mapping intervention names to their corresponding values
-        if hasattr(self.problem, 'interventions') and self.problem.interventions:
-            intervention_dict = dict(zip([x[0] for x in self.problem.interventions], best_solution))
-            print(f"Interventions: {intervention_dict}")
-
-        if mode == "classify":
-            print("\nTop 5 Crops by Suitability:")
-            for crop, suitability in top_crops:
-                print(f"{crop}: {suitability:.2f}%")
-        elif mode == "predict":
-            pass  # In predict mode, don't print the top 5 crops
-
-        return best_solution, best_fitness, best_crop, top_crops
\ No newline at end of file
+        # Log results based on the specified mode
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("GA best solution: Fitness = %.4f", best_fitness)
+            # Map intervention names to their corresponding values
+            if hasattr(self.problem, 'interventions') and self.problem.interventions:
+                logger.info("Interventions: %s", dict(zip([x[0] for x in self.problem.interventions], best_solution)))
+            if mode == "classify":
+                # In predict mode the top 5 crops aren't logged
+                logger.info("Top 5 crops by suitability: %s",
+                            ", ".join(f"{crop}: {suitability:.2f}%" for crop, suitability in top_crops))
+
+        return best_solution, best_fitness, best_crop, top_crops
+
+    def run_generations(self, population, generations):
+        """
+        Evolve `population` for a fixed number of generations (no early stopping).
+        Returns (population, fitness_values, best_solution, best_fitness, best_crop).
+        """
+        best_solution, best_fitness, best_crop = None, -float('inf'), None
+        for _ in range(generations):
+            population = self.evolve_population(population)
+            for individual, (fitness, crop) in zip(population, self.evaluate_population(population)):
+                if fitness > best_fitness:
+                    best_solution, best_fitness, best_crop = individual.copy(), fitness, crop
+        fitness_values = [fitness for fitness, _ in self.evaluate_population(population)]
+        return population, fitness_values, best_solution, best_fitness, best_crop
+
+    def _island_settings(self):
+        return {
+            'population_size': self.population_size,
+            'mutation_rate': self.mutation_rate,
+            'tournament_size': self.tournament_size,
+            'cache_size': self.cache_size,
+        }
+
+    def _migrate(self, populations, fitness_values):
+        """
+        Ring migration: each island's best individuals replace the next
+        island's worst. Islands whose fitness is None (their epoch failed)
+        sit this migration out, as neither source nor target.
+        """
+        count = min(self.migration_size, self.population_size - 1)
+        ring = [k for k, fit in enumerate(fitness_values) if fit is not None]
+        if count <= 0 or len(ring) < 2:
+            return populations
+        ranked = {k: sorted(range(len(populations[k])), key=lambda i: fitness_values[k][i], reverse=True) for k in ring}
+        migrants = {k: [copy.deepcopy(populations[k][i]) for i in ranked[k][:count]] for k in ring}
+        for position, k in enumerate(ring):
+            target = ring[(position + 1) % len(ring)]
+            for slot, individual in zip(ranked[target][::-1][:count], migrants[k]):
+                populations[target][slot] = individual
+        return populations
+
+    def _solve_islands(self, mode, initial_population=None):
+        """Island-model GA: parallel sub-populations with periodic elite migration."""
+        from .Engine_runner import run_engines
+
+        # A warm start is dealt out round-robin, so the islands don't all begin from the same individuals
+        populations = [self._starting_population(initial_population[k::self.islands] if initial_population else None)
+                       for k in range(self.islands)]
+        if not all(populations):
+            raise ValueError("Failed to initialize population")
+
+        best_solution, best_fitness, best_crop = None, -float('inf'), None
+        settings = self._island_settings()
+        generation = 0
+        stale_epochs = 0
+        patience = max(1, 10 // max(1, self.migration_interval))
+
+        while generation < self.generations:
+            epoch = min(self.migration_interval, self.generations - generation)
+            jobs = {
+                k: (_evolve_island, (self.problem, settings, population, epoch, self.rng.randrange(2 ** 32)), {})
+                for k, population in enumerate(populations)
+            }
+            outcomes = run_engines(jobs, executor=self.island_executor, pool_name="ga_islands", record_metrics=False)
+
+            fitness_values = []
+            improved = False
+            for k in range(self.islands):
+                try:
+                    population, fitness, island_best, island_fitness, island_crop = outcomes[k].result()
+                except Exception as e:
+                    logger.error("Error in island %d: %s", k, e)
+                    # Keeps its population but is left out of this migration
+                    fitness_values.append(None)
+                    continue
+                populations[k] = population
+                fitness_values.append(fitness)
+                if island_best is not None and island_fitness > best_fitness:
+                    best_solution, best_fitness, best_crop = island_best, island_fitness, island_crop
+                    improved = True
+
+            generation += epoch
+            self.generations_run = generation
+            logger.debug("Generation %d: Fitness = %.4f, Crop = %s (%d islands)", generation, best_fitness, best_crop, self.islands)
+
+            stale_epochs = 0 if improved else stale_epochs + 1
+            if stale_epochs >= patience:
+                logger.debug("Early stopping at generation %d", generation)
+                break
+
+            populations = self._migrate(populations, fitness_values)
+
+        return self._finalize(best_solution, best_fitness, best_crop, mode)
+
+
+def _evolve_island(problem, settings, population, generations, seed):
+    """Worker entry point: evolve one island for one migration epoch."""
+    ga = GeneticAlgorithm(problem, seed=seed, **settings)
+    result = ga.run_generations(population, generations)
+    Metrics.inc("crop_ga_fitness_evaluations_total", ga.fitness_cache.misses)
+    Metrics.inc("crop_ga_fitness_cache_hits_total", ga.fitness_cache.hits)
+    return result
@@ -0,0 +1,206 @@
+import hashlib
+import math
+import os
+import pickle
+import threading
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_DATA_FILE = os.path.join(DATA_DIR, 'Crop_Data.csv')
+
+FEATURES = ('N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall')
+SCORE_COLUMNS = ('frost_risk', 'pest_pressure', 'crop_density')
+
+
+class KnowledgeBaseChangedError(RuntimeError):
+    """Raised when a pickled knowledge base is restored after its CSV changed."""
+
+
+def _read_only(array):
+    array = np.ascontiguousarray(array, dtype=float)
+    array.setflags(write=False)
+    return array
+
+
+class CropKnowledgeBase:
+    """
+    Immutable view of the crop dataset shared by A*, Greedy, GA and CSP.
+
+    Everything the engines need from the CSV is derived once here: the
+    per-crop requirement ranges, the per-crop feature means, the dataset-wide
+    feature bounds and the frost/pest/density scores. Instances are cached by
+    `get_knowledge_base` and must not be mutated.
+    """
+    def __init__(self, df, file_path=None, mtime=None):
+        if 'label' not in df.columns:
+            raise ValueError("Error: 'label' column not found in the CSV file.")
+
+        self.file_path = file_path
+        self.mtime = mtime
+        self.features = FEATURES
+        # Content hash of the dataset; cached engine results are only valid for the same version
+        self.version = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()[:16]
+
+        features = list(FEATURES)
+        crop_stats = df.groupby('label')[features].agg(['min', 'max'])
+        crop_means = df.groupby('label', sort=False)[features].mean()
+
+        crop_requirements = {}
+        for crop in crop_stats.index:
+            feature_ranges = {}
+            for feature in features:
+                min_val = crop_stats.loc[crop, (feature, 'min')]
+                max_val = crop_stats.loc[crop, (feature, 'max')]
+                feature_ranges[feature] = (round(min_val, 1), round(max_val, 1))
+            crop_requirements[crop] = MappingProxyType(feature_ranges)
+        self.crop_requirements = MappingProxyType(crop_requirements)
+        self.crop_names = tuple(crop_requirements)
+        self.crop_index = MappingProxyType({crop: i for i, crop in enumerate(crop_requirements)})
+
+        # Requirement ranges as (crops x features) bounds for broadcast goal tests
+        self.requirement_lower = _read_only([[r[f][0] for f in features] for r in crop_requirements.values()])
+        self.requirement_upper = _read_only([[r[f][1] for f in features] for r in crop_requirements.values()])
+        self.requirement_midpoints = _read_only((self.requirement_lower + self.requirement_upper) / 2)
+
+        # Profiles keep the order in which crops first appear in the CSV
+        self.crop_profiles = MappingProxyType({
+            crop: MappingProxyType({f: crop_means.loc[crop, f] for f in features})
+            for crop in crop_means.index
+        })
+
+        # Crop means as a (crops x features) matrix, rows in `profile_names` order
+        self.profile_names = tuple(self.crop_profiles)
+        self.profile_matrix = _read_only(crop_means[features].to_numpy())
+
+        self.dataset = df[features + ['label']].rename(columns={'label': 'Crop_Type'})
+        self.feature_min = _read_only(df[features].min().to_numpy())
+        self.feature_max = _read_only(df[features].max().to_numpy())
+        # Largest possible distance inside the feature bounds, used to normalize GA distances
+        self.max_distance = math.sqrt(sum((hi - lo) ** 2 for lo, hi in zip(self.feature_min, self.feature_max)))
+
+        score_columns = ['label'] + [c for c in SCORE_COLUMNS if c in df.columns]
+        self.score_table = df[score_columns].reset_index(drop=True)
+        self._build_score_index()
+
+    def _build_score_index(self):
+        """
+        Group the frost/pest/density scores by label so that picking the best
+        crop among candidates never touches the DataFrame again.
+        """
+        scores = np.zeros((len(self.score_table), len(SCORE_COLUMNS)))
+        for j, column in enumerate(SCORE_COLUMNS):
+            if column in self.score_table.columns:
+                scores[:, j] = self.score_table[column].fillna(0).to_numpy(dtype=float)
+
+        labels = self.score_table['label'].to_numpy()
+        index = {}
+        for label in pd.unique(labels):
+            positions = np.flatnonzero(labels == label)
+            index[label] = (_read_only(scores[positions]), positions)
+        self.score_index = MappingProxyType(index)
+
+        # Best row per label under the default weights (1, 1, 1)
+        self._default_best = MappingProxyType({
+            label: self._best_row(label, (1.0, 1.0, -1.0)) for label in index
+        })
+
+    @classmethod
+    def from_csv(cls, file_path=DEFAULT_DATA_FILE):
+        """Load the knowledge base from a CSV file."""
+        file_path = os.path.abspath(file_path)
+        mtime = os.path.getmtime(file_path)
+        return cls(pd.read_csv(file_path), file_path=file_path, mtime=mtime)
+
+    def suitability(self, environments):
+        """
+        Test one environment (shape: features) or a batch (shape: n x features)
+        against every crop in a single broadcast comparison.
+
+        Returns (suitable_mask, match_counts), both with a trailing crops axis,
+        in the order of `crop_names`.
+        """
+        env = np.asarray(environments, dtype=float)[..., np.newaxis, :]
+        within = (env >= self.requirement_lower) & (env <= self.requirement_upper)
+        match_counts = within.sum(axis=-1)
+        return match_counts == len(self.features), match_counts
+
+    def _best_row(self, label, signed_weights):
+        values, positions = self.score_index[label]
+        row_scores = values @ signed_weights
+        i = int(np.argmin(row_scores))
+        return float(row_scores[i]), int(positions[i])
+
+    def best_crop(self, candidate_labels, weight_frost=1.0, weight_pest=1.0, weight_density=1.0):
+        """
+        Among `candidate_labels`, return the label of the dataset row minimizing
+            score = wf*frost_risk + wp*pest_pressure - wd*crop_density
+        or None if no candidate appears in the dataset. Ties go to the row that
+        comes first in the CSV.
+        """
+        signed_weights = np.array([weight_frost, weight_pest, -weight_density], dtype=float)
+        use_default = weight_frost == 1.0 and weight_pest == 1.0 and weight_density == 1.0
+
+        best = None
+        best_label = None
+        for label in candidate_labels:
+            if label not in self.score_index:
+                continue
+            row = self._default_best[label] if use_default else self._best_row(label, signed_weights)
+            if best is None or row < best:
+                best = row
+                best_label = label
+        return best_label
+
+    def __reduce__(self):
+        # Worker processes rebuild the knowledge base from their own cache
+        # instead of receiving a pickled copy of the dataset; the version makes
+        # sure they rebuild the one the sender used (and keyed its cache with).
+        if self.file_path is None:
+            raise pickle.PicklingError("A knowledge base without a file_path can't be sent to another process")
+        return _restore_knowledge_base, (self.file_path, self.version)
+
+    def __repr__(self):
+        return f"CropKnowledgeBase(file_path={self.file_path!r}, version={self.version!r}, crops={len(self.crop_requirements)})"
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_knowledge_base(file_path=None):
+    """
+    Return the shared knowledge base for `file_path`.
+
+    The CSV is parsed on first use and again only when its modification time
+    changes, so every request after the first reuses the same instance.
+    """
+    file_path = os.path.abspath(file_path or DEFAULT_DATA_FILE)
+    mtime = os.path.getmtime(file_path)
+
+    cached = _cache.get(file_path)
+    if cached is not None and cached.mtime == mtime:
+        return cached
+
+    with _cache_lock:
+        cached = _cache.get(file_path)
+        if cached is None or cached.mtime != mtime:
+            cached = CropKnowledgeBase.from_csv(file_path)
+            _cache[file_path] = cached
+    return cached
+
+
+def _restore_knowledge_base(file_path, version):
+    knowledge_base = get_knowledge_base(file_path)
+    if knowledge_base.version != version:
+        raise KnowledgeBaseChangedError(
+            f"{file_path} changed (version {version} -> {knowledge_base.version}), please retry")
+    return knowledge_base
+
+
+def clear_knowledge_base_cache():
+    """Drop every cached knowledge base (mainly useful for tests)."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,78 @@
+"""
+Logging for the engines, routes and jobs.
+
+Modules log through `get_logger(__name__)` with %-style arguments, so a
+message below the logger's level is never formatted. Progress messages from
+the search, GA and formatting loops are DEBUG and therefore silent unless a
+module is turned up. Loggers from `get_logger` share RATE_LIMIT, which lets
+a repeated warning or error from one call site through once per interval and
+reports how many copies it dropped in the meantime.
+"""
+import logging
+import threading
+import time
+
+# Loggers configure_logging sets the default level of
+PACKAGES = ("AI_engine", "routes", "jobs", "tracing")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass records from one call site at most once per `interval` seconds (only at `min_level` and above)."""
+    def __init__(self, interval=60.0, min_level=logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.min_level = min_level
+        self._seen = {}  # (logger, file, line) -> [time last passed, records dropped since]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.min_level or not self.interval:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            dropped = entry[1] if entry is not None else 0
+            self._seen[key] = [now, 0]
+        if dropped:
+            record.msg = f"{record.getMessage()} ({dropped} similar messages suppressed)"
+            record.args = None
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._seen.clear()
+
+
+RATE_LIMIT = RateLimitFilter()
+
+
+def get_logger(name):
+    """The logger for module `name`, with the shared warning rate limit."""
+    logger = logging.getLogger(name)
+    logger.addFilter(RATE_LIMIT)
+    return logger
+
+
+def configure_logging(level="WARNING", levels=None, rate_limit=None):
+    """
+    Set the level of the app's loggers (PACKAGES), then per-module overrides
+    from `levels`, e.g. {'AI_engine.Genetic': 'DEBUG'}. `rate_limit` is the
+    rate-limit interval in seconds (0 disables it). A stderr handler is added
+    to the root logger unless something has configured one already.
+    """
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    for name in PACKAGES:
+        logging.getLogger(name).setLevel(level)
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+    if rate_limit is not None:
+        RATE_LIMIT.interval = rate_limit
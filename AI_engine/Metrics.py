@@ -0,0 +1,190 @@
+"""
+In-process metrics registry, rendered in the Prometheus text format.
+
+Engines record counters and histograms with `inc` and `observe`. Code
+running in a worker process records into a `capture_metrics()` block
+instead; run_engines ships the captured values back with the result and
+merges them into the parent's registry. Each server process keeps its own
+registry, so with several server processes each one reports its own values.
+"""
+import math
+import threading
+from contextlib import contextmanager
+
+# Seconds, for engine and request latencies
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Per-run work counts, e.g. nodes expanded
+COUNT_BUCKETS = (1, 10, 100, 1000, 5000, 20000, 100000)
+
+# name -> (type, help, buckets); shared by every registry
+METRICS = {}
+
+
+def define(name, kind, help, buckets=None):
+    """Declare a metric: kind is 'counter', 'gauge' or 'histogram' (with sorted `buckets`)."""
+    if kind not in ("counter", "gauge", "histogram"):
+        raise ValueError(f"Unknown metric type '{kind}'")
+    if kind == "histogram" and not buckets:
+        raise ValueError("A histogram needs buckets")
+    METRICS[name] = (kind, help, tuple(buckets) if buckets else None)
+
+
+define("crop_engine_duration_seconds", "histogram", "Wall time of engine runs that were not served from the cache.",
+       LATENCY_BUCKETS)
+define("crop_engine_runs_total", "counter", "Engine runs by outcome (ok, error, timeout, cached).")
+define("crop_search_nodes_expanded", "histogram", "Nodes expanded per search.", COUNT_BUCKETS)
+define("crop_search_frontier_peak", "histogram", "Largest frontier size per search.", COUNT_BUCKETS)
+define("crop_search_heuristic_calls_total", "counter", "Heuristic evaluations of generated states.")
+define("crop_search_truncated_total", "counter", "Searches stopped by the node budget or time limit.")
+define("crop_ga_generations_total", "counter", "GA generations evolved.")
+define("crop_ga_fitness_evaluations_total", "counter", "GA fitness evaluations (fitness cache misses).")
+define("crop_ga_fitness_cache_hits_total", "counter", "GA fitness lookups answered by the fitness cache.")
+define("crop_csp_backtracks_total", "counter", "CSP backtracking nodes visited.")
+define("crop_csp_revisions_total", "counter", "CSP AC-3 arc revisions.")
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Current values of the metrics declared with `define`, keyed by label set."""
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        """Add `amount` to a counter (or gauge)."""
+        key = _key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """Set a gauge."""
+        with self._lock:
+            self._values[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram."""
+        buckets = METRICS[name][2]
+        key = _key(name, labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        """A picklable copy of every value, for `merge`."""
+        with self._lock:
+            return {key: [list(v[0]), v[1], v[2]] if isinstance(v, list) else v for key, v in self._values.items()}
+
+    def merge(self, snapshot):
+        """Add the values of another registry's snapshot (gauges are overwritten)."""
+        with self._lock:
+            for key, value in snapshot.items():
+                current = self._values.get(key)
+                if isinstance(value, list):
+                    if current is None:
+                        self._values[key] = [list(value[0]), value[1], value[2]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                        current[2] += value[2]
+                elif METRICS.get(key[0], ("counter",))[0] == "gauge" or current is None:
+                    self._values[key] = value
+                else:
+                    self._values[key] = current + value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        """Every declared metric in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, (kind, help, buckets) in METRICS.items():
+            samples = sorted((labels, value) for (metric, labels), value in snapshot.items() if metric == name)
+            lines.extend(format_metric(name, kind, help, samples, buckets))
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def format_metric(name, kind, help, samples, buckets=None):
+    """
+    Text-format lines for one metric. `samples` is [(labels, value)] with
+    labels as (key, value) pairs; histogram values are
+    [bucket counts, sum, count].
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        labels = tuple(labels)
+        if kind == "histogram":
+            counts, total, count = value
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(float(bound))),))} {bucket_count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(float(total))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+REGISTRY = MetricsRegistry()
+_local = threading.local()
+
+
+def registry():
+    """The registry to record into: the innermost active capture, else the process-wide REGISTRY."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else REGISTRY
+
+
+@contextmanager
+def capture_metrics():
+    """Record this thread's metrics into a fresh registry (yielded) instead of the current one."""
+    captured = MetricsRegistry()
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(captured)
+    try:
+        yield captured
+    finally:
+        stack.pop()
+
+
+def inc(name, amount=1, **labels):
+    if amount:
+        registry().inc(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    registry().observe(name, value, **labels)
+
+
+def merge(snapshot):
+    """Merge captured values (see `capture_metrics`) into the current registry."""
+    if snapshot:
+        registry().merge(snapshot)
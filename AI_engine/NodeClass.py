@@ -1,18 +1,30 @@
 class Node:
+    __slots__ = ('state', 'parent', 'action', 'cost', 'h', 'f', 'depth', 'children', 'key')
+
     def __init__(self, state=None, parent=None, action=None, cost=0, h=None):
         self.state = state
         self.parent = parent
         self.action = action
         self.cost = cost
         self.h = h
-        # Depth and children for visualization
+        # f = g + h is fixed once the node is built, so compute it once
+        self.f = cost + (h or 0)
+        # Depth and children for visualization (children stay empty unless the tree is kept)
         self.depth = 0 if parent is None else parent.depth + 1
-        self.children = []
+        self.children = ()
+        # Transposition key assigned by the search for closed-set lookups
+        self.key = None
+
+    def add_child(self, child):
+        """Link a child node; only used when the search tree is kept for visualization."""
+        if not self.children:
+            self.children = []
+        self.children.append(child)
 
     # Comparison operators for priority queue ordering
-    def __lt__(self, other): return (self.h + self.cost) < (other.h + other.cost)
-    def __gt__(self, other): return (self.h + self.cost) > (other.h + other.cost)
-    def __le__(self, other): return (self.h + self.cost) <= (other.h + other.cost)
-    def __ge__(self, other): return (self.h + self.cost) >= (other.h + other.cost)
-    def __eq__(self, other): return (self.h + self.cost) == (other.h + other.cost)
-    def __ne__(self, other): return (self.h + self.cost) != (other.h + other.cost)
+    def __lt__(self, other): return self.f < other.f
+    def __gt__(self, other): return self.f > other.f
+    def __le__(self, other): return self.f <= other.f
+    def __ge__(self, other): return self.f >= other.f
+    def __eq__(self, other): return self.f == other.f
+    def __ne__(self, other): return self.f != other.f
@@ -1,33 +1,50 @@
-from AI_engine.Utility_functions import agricultural_practices_effects, get_crop_requirements
+from AI_engine.Utility_functions import agricultural_practices_effects
+from AI_engine.Knowledge_base import get_knowledge_base
 import numpy as np
 import pandas as pd
 import copy
 from copy import deepcopy
 import math
+from AI_engine.Log_config import get_logger
+
+logger = get_logger(__name__)
 
 class CropState:
     """
     Represents a state in the search space with environmental conditions and resource usage.
+
+    The environment is stored as a tuple and resource usage is only materialized
+    when asked for, so producing a child state allocates one tuple and one object.
     """
-    def __init__(self, environment, resource_usage=None, parent=None, action=None):
+    __slots__ = ('environment', '_resource_usage', '_usage_delta', 'parent', 'action')
+
+    def __init__(self, environment, resource_usage=None, parent=None, action=None, usage_delta=None):
         # Environmental conditions (N, P, K, pH, temperature, humidity, etc.)
-        if isinstance(environment, list):
-            self.environment = environment.copy()
-        else:
-            self.environment = list(environment)
+        self.environment = tuple(environment)
 
-        # Track resource usage (organic matter, irrigation, fertilizer)
-        if resource_usage is None:
-            self.resource_usage = {}
-        else:
-            self.resource_usage = resource_usage.copy()
+        # Track resource usage (organic matter, irrigation, fertilizer). When
+        # only a usage delta is given, the dict is rebuilt from the parent on access.
+        if resource_usage is None and usage_delta is None:
+            resource_usage = {}
+        self._resource_usage = None if resource_usage is None else dict(resource_usage)
+        self._usage_delta = usage_delta
 
         # Parent state and action taken to reach this state
         self.parent = parent
         self.action = action
 
+    @property
+    def resource_usage(self):
+        if self._resource_usage is None:
+            usage = self.parent.resource_usage.copy() if self.parent is not None else {}
+            if self._usage_delta:
+                action_type, amount = self._usage_delta
+                usage[action_type] = usage.get(action_type, 0) + amount
+            self._resource_usage = usage
+        return self._resource_usage
+
     def __repr__(self):
-        return f"CropState(environment={self.environment})"
+        return f"CropState(environment={list(self.environment)})"
     
     def __eq__(self, other):
         """Two states are equal if they have the same environmental conditions"""
@@ -37,17 +54,17 @@ class CropState:
 
     def __hash__(self):
         """Hash function to use state in sets/dictionaries"""
-        return hash(tuple(self.environment))
+        return hash(self.environment)
 
     def copy(self):
         """Create a deep copy of the state."""
-        return CropState(self.environment.copy(), self.resource_usage.copy())
+        return CropState(self.environment, self.resource_usage)
     
 class CropPredictionProblem:
     """
     Defines the crop prediction problem
     """
-    def __init__(self, initial_state, data_file='Crop_Data.csv'):
+    def __init__(self, initial_state, data_file=None, knowledge_base=None):
         """
         Initialize the problem with initial state and crop growth zones.
 
@@ -56,7 +73,9 @@ class CropPredictionProblem:
         initial_state : CropState or list
             The initial environmental conditions
         data_file : str
-            Path to the crop data CSV file
+            Path to the crop data CSV file (defaults to data/Crop_Data.csv)
+        knowledge_base : CropKnowledgeBase, optional
+            Already loaded knowledge base; looked up from `data_file` if omitted
         """
         # Ensure initial_state is a CropState object
         if isinstance(initial_state, list):
@@ -68,12 +87,13 @@ class CropPredictionProblem:
             self.initial_state = CropState(list(initial_state))
             
         
-        # Load crop requirements and data
+        # Crop requirements and data come from the shared, process-wide knowledge base
         try:
-            self.crop_requirements, self.dataset, self.features, self.crop_profiles = get_crop_requirements(data_file)
-            
+            self._bind_knowledge_base(knowledge_base or get_knowledge_base(data_file))
+
         except Exception as e:
-            print(f"Error loading crop data: {e}")
+            logger.error("Error loading crop data: %s", e)
+            self.knowledge_base = None
             self.crop_requirements = {}
             self.dataset = None
             self.features = []
@@ -99,6 +119,7 @@ class CropPredictionProblem:
         # Define feature names and their indices in the state vector
         self.feature_names = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
         self.feature_indices = {feature: i for i, feature in enumerate(self.feature_names)}
+        self._action_deltas = {}
         
         # Define feature weights to be used in the heuristic function
         self.feature_weights = {
@@ -111,71 +132,85 @@ class CropPredictionProblem:
             'ph': 0.059807            # Lowest weight
         }
 
+        # Weighted crop target midpoints (crops x features) used by the heuristic
+        self._heuristic_weights = np.array([self.feature_weights.get(f, 1.0) for f in self.feature_names])
+        if self.knowledge_base is not None:
+            self._weighted_targets = self.knowledge_base.requirement_midpoints * self._heuristic_weights
+            self._target_norms = np.linalg.norm(self._weighted_targets, axis=1)
+        else:
+            self._weighted_targets = np.empty((0, len(self.feature_names)))
+            self._target_norms = np.empty(0)
+
+    _KNOWLEDGE_BASE_ATTRIBUTES = ('crop_requirements', 'dataset', 'features', 'crop_profiles')
+
+    def _bind_knowledge_base(self, knowledge_base):
+        self.knowledge_base = knowledge_base
+        self.crop_requirements = knowledge_base.crop_requirements
+        self.dataset = knowledge_base.dataset
+        self.features = list(knowledge_base.features)
+        self.crop_profiles = knowledge_base.crop_profiles
+
+    def __getstate__(self):
+        # Pickle a light snapshot: the knowledge base travels as a file path and
+        # the views derived from it are re-attached on the other side.
+        state = self.__dict__.copy()
+        if self.knowledge_base is not None:
+            for name in self._KNOWLEDGE_BASE_ATTRIBUTES:
+                state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.knowledge_base is not None:
+            self._bind_knowledge_base(self.knowledge_base)
+
     @staticmethod
     def choose_best_crop_from_labels(candidate_labels,
                                      weight_frost=1.0,
                                      weight_pest=1.0,
                                      weight_density=1.0,
-                                     csv_path="Crop_Data.csv"):
+                                     csv_path=None,
+                                     knowledge_base=None):
         """
         From the normalized CSV, pick the label of the crop (string)
         among `candidate_labels` that minimizes:
             score = wf*frost_risk + wp*pest_pressure - wd*crop_density
+        The lookup uses the per-label score index of the knowledge base.
         """
         try:
-            df_norm = pd.read_csv(csv_path)
+            kb = knowledge_base or get_knowledge_base(csv_path)
         except Exception as e:
-            print(f"Error reading CSV {csv_path}: {e}")
+            logger.error("Error reading CSV %s: %s", csv_path, e)
             return candidate_labels[0] if candidate_labels else "unknown"
-            
-        best_score = float('inf')
-        best_row = None
-
-        for _, row in df_norm.iterrows():
-            if row['label'] in candidate_labels:
-                score = (
-                    weight_frost   * row.get('frost_risk', 0) +
-                    weight_pest    * row.get('pest_pressure', 0) -
-                    weight_density * row.get('crop_density', 0)
-                )
-                if score < best_score:
-                    best_score = score
-                    best_row = row
 
-        if best_row is None:
-            print(f"No rows found for labels: {candidate_labels}")
+        best_label = kb.best_crop(candidate_labels, weight_frost, weight_pest, weight_density)
+        if best_label is None:
+            logger.warning("No rows found for labels: %s", candidate_labels)
             return candidate_labels[0] if candidate_labels else "unknown"
 
-        return best_row['label']  # Return just the label (string)
+        return best_label  # Return just the label (string)
 
     def is_goal(self, current_state):
         """
         Check if the current state is a goal state (suitable for any crop).
         """
         if not isinstance(current_state, CropState):
-            print(f"Warning: Expected CropState, got {type(current_state)}")
+            logger.warning("Expected CropState, got %s", type(current_state))
             return False, None
             
         if not self.crop_requirements:
-            print("No crop requirements loaded")
+            logger.warning("No crop requirements loaded")
             return False, None
             
-        candidates = []
-        best_crop = None
-        best_match_count = -1
-
-        for crop_name, crop_ranges in self.crop_requirements.items():
-            try:
-                is_suitable, match_count = self._is_suitable_for_crop(current_state.environment, crop_name)
+        try:
+            suitable, match_counts = self.knowledge_base.suitability(current_state.environment)
+        except Exception as e:
+            logger.error("Error checking crop suitability: %s", e)
+            return False, None
 
-                if is_suitable:
-                    candidates.append(crop_name)
-                elif match_count > best_match_count:
-                    best_match_count = match_count
-                    best_crop = crop_name
-            except Exception as e:
-                print(f"Error checking suitability for {crop_name}: {e}")
-                continue
+        crop_names = self.knowledge_base.crop_names
+        candidates = [crop_names[i] for i in np.flatnonzero(suitable)]
+        best_crop = crop_names[int(np.argmax(match_counts))]
 
         if candidates:
             try:
@@ -184,11 +219,11 @@ class CropPredictionProblem:
                     weight_frost=1.0,
                     weight_pest=1.0,
                     weight_density=1.0,
-                    csv_path="data/Crop_Data.csv"  
+                    knowledge_base=self.knowledge_base
                 )
                 return True, best_crop_label
             except Exception as e:
-                print(f"Error choosing best crop: {e}")
+                logger.error("Error choosing best crop: %s", e)
                 return True, candidates[0]
 
         return False, best_crop
@@ -198,30 +233,27 @@ class CropPredictionProblem:
         Check if the environment is suitable for a specific crop.
         Returns: (is_suitable, match_count) tuple
         """
-        if crop_name not in self.crop_requirements:
+        crop_idx = self.knowledge_base.crop_index.get(crop_name) if self.knowledge_base else None
+        if crop_idx is None:
             return False, 0
-            
-        crop_ranges = self.crop_requirements[crop_name]
-        match_count = 0
-        total_features = 0
 
-        # Check each relevant environmental factor
-        for feature, (min_val, max_val) in crop_ranges.items():
-            idx = self.feature_indices.get(feature)
-            if idx is not None and idx < len(environment):
-                total_features += 1
-                if min_val <= environment[idx] <= max_val:
-                    match_count += 1
+        suitable, match_counts = self.knowledge_base.suitability(environment)
+        return bool(suitable[crop_idx]), int(match_counts[crop_idx])
 
-        # All features must match for suitability
-        return match_count == total_features, match_count
+    def check_suitability(self, states):
+        """
+        Batch goal test: returns (suitable_mask, match_counts) with shape
+        (n_states, n_crops) for a list of CropStates or environment vectors.
+        """
+        environments = [s.environment if isinstance(s, CropState) else s for s in states]
+        return self.knowledge_base.suitability(environments)
 
     def get_valid_actions(self, state):
         """
         Dynamically generate valid actions based on available practices from the effects data.
         """
         if not isinstance(state, CropState):
-            print(f"Warning: Expected CropState in get_valid_actions, got {type(state)}")
+            logger.warning("Expected CropState in get_valid_actions, got %s", type(state))
             return []
             
         valid_actions = []
@@ -249,32 +281,36 @@ class CropPredictionProblem:
         Apply an action to a state and return the new state using realistic effects data.
         """
         if not isinstance(state, CropState):
-            print(f"Warning: Expected CropState in apply_action, got {type(state)}")
+            logger.warning("Expected CropState in apply_action, got %s", type(state))
             return state
             
         action_type, amount = action
-        new_environment = state.environment.copy()
-        new_resource_usage = state.resource_usage.copy() if state.resource_usage else {}
+        delta = self._action_delta(action)
+        if delta is None:
+            # Actions without modelled effects leave the environment unchanged
+            return CropState(state.environment, parent=state, action=action, usage_delta=())
 
-        if action_type in agricultural_practices_effects:
-            effects = agricultural_practices_effects[action_type]["effects"]
+        new_environment = tuple(value + change for value, change in zip(state.environment, delta))
+        return CropState(new_environment, parent=state, action=action, usage_delta=(action_type, amount))
 
-            for feature, effect_info in effects.items():
-                effect_per_unit = effect_info["effect_per_unit"]
+    def _action_delta(self, action):
+        """Per-feature change produced by an action, cached per (action_type, amount)."""
+        try:
+            return self._action_deltas[action]
+        except KeyError:
+            pass
 
+        action_type, amount = action
+        delta = None
+        if action_type in agricultural_practices_effects:
+            delta = [0.0] * len(self.feature_names)
+            for feature, effect_info in agricultural_practices_effects[action_type]["effects"].items():
                 # Get the index of the feature from the state's feature mapping
                 if feature in self.feature_indices:
-                    idx = self.feature_indices[feature]
-                    if idx < len(new_environment):
-                        new_environment[idx] += amount * effect_per_unit
-
-            # Track the applied resource
-            if action_type not in new_resource_usage:
-                new_resource_usage[action_type] = 0
-            new_resource_usage[action_type] += amount
-
-        # Create and return new state
-        return CropState(new_environment, new_resource_usage, parent=state, action=action)
+                    delta[self.feature_indices[feature]] = amount * effect_info["effect_per_unit"]
+            delta = tuple(delta)
+        self._action_deltas[action] = delta
+        return delta
 
     def get_action_cost(self, action):
         """
@@ -304,179 +340,153 @@ class CropPredictionProblem:
         Weighted heuristic function estimating cost to goal.
         """
         if not isinstance(state, CropState):
-            print(f"Warning: Expected CropState in heuristic, got {type(state)}")
+            logger.warning("Expected CropState in heuristic, got %s", type(state))
             return float('inf')
             
         if not self.crop_requirements:
             return float('inf')
-            
-        # Get the current environment vector
-        current_environment = state.environment
 
-        # Track the best (highest) similarity found so far
-        best_similarity = -1.0  # Cosine similarity ranges from -1 to 1
+        return float(self.heuristic_batch([state])[0])
 
-        for crop_name, crop_ranges in self.crop_requirements.items():
-            # Build vectors for comparison - using only features that exist in our feature_indices
-            current_vector = []
-            target_vector = []
-            weight_vector = []
+    def heuristic_batch(self, states):
+        """
+        Heuristic for many states at once (e.g. all children of an expansion).
 
-            for feature, (min_val, max_val) in crop_ranges.items():
-                if feature in self.feature_indices:
-                    idx = self.feature_indices[feature]
-
-                    # Make sure the index is valid for our environment vector
-                    if idx < len(current_environment):
-                        current_value = current_environment[idx]
-                        # Use midpoint of range as target value
-                        target_value = (min_val + max_val) / 2
-                        # Get the weight for this feature
-                        weight = self.feature_weights.get(feature, 1.0)
-
-                        current_vector.append(current_value)
-                        target_vector.append(target_value)
-                        weight_vector.append(weight)
-
-            if len(current_vector) == 0:
-                continue
-                
-            current_vector = np.array(current_vector)
-            target_vector = np.array(target_vector)
-            weight_vector = np.array(weight_vector)
-
-            # Calculate weighted cosine similarity if vectors aren't empty
-            if len(current_vector) > 0 and len(target_vector) > 0:
-                # Apply weights to the current and target vectors
-                weighted_current = current_vector * weight_vector
-                weighted_target = target_vector * weight_vector
-
-                # Compute magnitudes of weighted vectors
-                norm_current = np.linalg.norm(weighted_current)
-                norm_target = np.linalg.norm(weighted_target)
-
-                # Compute similarity (avoid division by zero)
-                if norm_current > 0 and norm_target > 0:
-                    dot_product = np.dot(weighted_current, weighted_target)
-                    similarity = dot_product / (norm_current * norm_target)
-                    best_similarity = max(best_similarity, similarity)
-
-        # Convert similarity to a distance metric (lower is better for A* search)
-        # Cosine similarity ranges from -1 to 1, so this gives us a range of 0-2
-        # where 0 is perfect alignment and 2 is perfect opposition
+        The weighted cosine similarity between every state and every crop's
+        target midpoint comes out of a single matrix product; each state's
+        heuristic is 1 - its best similarity, so 0 is perfect alignment and 2
+        is perfect opposition (or no comparable crop).
+        """
+        if not states:
+            return np.empty(0)
+        if not self.crop_requirements:
+            return np.full(len(states), float('inf'))
+
+        environments = np.array([s.environment for s in states], dtype=float)
+        weighted_current = environments * self._heuristic_weights
+        norm_current = np.linalg.norm(weighted_current, axis=1)
+
+        dot_products = weighted_current @ self._weighted_targets.T
+        norms = np.outer(norm_current, self._target_norms)
+        valid = norms > 0
+        similarity = np.full(dot_products.shape, -1.0)
+        np.divide(dot_products, norms, out=similarity, where=valid)
+
+        # Cosine similarity ranges from -1 to 1; crops that can't be compared count as -1
+        best_similarity = similarity.max(axis=1, initial=-1.0)
         return 1 - best_similarity
 
     # Functions for Genetic Algorithm
     def apply_interventions(self, chromosome):
         """Apply interventions to user conditions."""
-        if not self.features or self.dataset is None:  # Changed from 'not self.dataset'
-            print("Warning: No features or dataset loaded for GA")
+        if not self.features or self.knowledge_base is None:
+            logger.warning("No features or dataset loaded for GA")
             return {}
-            
-        state_arr = copy.deepcopy(self.initial_state.environment)
-        # convert the state from np array to dictionary 
-        state = {self.features[i]: state_arr[i] for i in range(min(len(self.features), len(state_arr)))}
-        
+
+        environment = self._intervened_environments([chromosome])[0]
+        return {f: float(environment[i]) for i, f in enumerate(self.features)}
+
+    def _intervened_environments(self, population):
+        """
+        Apply every chromosome of `population` (individuals x genes) to the
+        initial state at once and clamp the result to the dataset bounds.
+        """
+        genes = np.asarray(population, dtype=float)
+        if genes.ndim == 1:
+            genes = genes[np.newaxis, :]
+        environments = np.tile(np.asarray(self.initial_state.environment, dtype=float)[:len(self.features)], (len(genes), 1))
+
         for i, (action, _) in enumerate(self.interventions):
-            if i >= len(chromosome):
+            if i >= genes.shape[1]:
                 break
-                
-            param = chromosome[i]
+
+            param = genes[:, i]
             if action in agricultural_practices_effects:
                 effects = agricultural_practices_effects[action]["effects"]
                 for feature, effect in effects.items():
-                    if feature in state:
+                    if feature in self.feature_indices:
+                        j = self.feature_indices[feature]
                         if feature in ['N', 'P', 'humidity']:  # Percentage increase
-                            state[feature] *= (1 + param * effect["effect_per_unit"] / 100)
+                            environments[:, j] *= (1 + param * effect["effect_per_unit"] / 100)
                         else:  # Absolute increase (K, ph)
-                            state[feature] += param * effect["effect_per_unit"]
-        
-        # Cap values - Fix the DataFrame boolean context issue
-        for f in self.features:
-            if f in state and self.dataset is not None and not self.dataset.empty:  # Added explicit empty check
-                min_val, max_val = self.dataset[f].min(), self.dataset[f].max()
-                state[f] = max(min_val, min(max_val, state[f]))
-        return state
+                            environments[:, j] += param * effect["effect_per_unit"]
+
+        # Cap values to the range seen in the dataset
+        return np.clip(environments, self.knowledge_base.feature_min, self.knowledge_base.feature_max)
+
+    def _crop_distances(self, environments):
+        """Euclidean distance from each environment to each crop mean (individuals x crops)."""
+        differences = environments[:, np.newaxis, :] - self.knowledge_base.profile_matrix
+        return np.sqrt((differences ** 2).sum(axis=-1))
 
     def find_closest_crop(self, state):
         """Find crop with smallest Euclidean distance to state."""
         if not self.crop_profiles or not self.features:
             return "unknown", float('inf')
-            
-        min_distance = float('inf')
-        closest_crop = None
-        for crop, means in self.crop_profiles.items():
-            try:
-                distance = math.sqrt(sum((state.get(f, 0) - means.get(f, 0)) ** 2 for f in self.features))
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_crop = crop
-            except Exception as e:
-                print(f"Error calculating distance for {crop}: {e}")
-                continue
-        return closest_crop or "unknown", min_distance
+
+        environment = np.array([[state.get(f, 0) for f in self.features]], dtype=float)
+        distances = self._crop_distances(environment)[0]
+        closest = int(np.argmin(distances))
+        return self.knowledge_base.profile_names[closest], float(distances[closest])
+
+    def evaluate_population(self, population):
+        """
+        Vectorized fitness for a whole population.
+
+        population is an (individuals x genes) array-like. Returns
+        (fitness, closest_crop_indices) arrays; indices point into
+        `knowledge_base.profile_names` (-1 when no data is loaded).
+        """
+        genes = np.asarray(population, dtype=float)
+        if genes.ndim == 1:
+            genes = genes[np.newaxis, :]
+        if self.knowledge_base is None or not self.features or len(genes) == 0:
+            return np.zeros(len(genes)), np.full(len(genes), -1)
+
+        # Distance to the closest crop, normalized by the largest possible distance
+        distances = self._crop_distances(self._intervened_environments(genes))
+        closest = distances.argmin(axis=1)
+        min_distances = distances[np.arange(len(genes)), closest]
+        max_distance = self.knowledge_base.max_distance
+        distance_score = 1 - (min_distances / max_distance) if max_distance > 0 else np.zeros(len(genes))
+
+        # Cost
+        total_cost = np.zeros(len(genes))
+        for i, (action, _) in enumerate(self.interventions):
+            if i < genes.shape[1]:
+                total_cost = total_cost + genes[:, i] * self.costs.get(action, 0)
+        max_cost = 500  # Estimated max
+        cost_score = np.where(total_cost <= max_cost, 1 - (total_cost / max_cost), 0)
+
+        # Fitness
+        fitness = 0.7 * distance_score + 0.3 * cost_score
+        return fitness, closest
 
     def evaluate(self, chromosome):  # fitness function
         """Compute fitness: distance to closest crop + cost."""
         try:
-            # Apply interventions
-            state = self.apply_interventions(chromosome)
-            
-            # Check if state is None or empty dict
-            if state is None or len(state) == 0:
+            if self.knowledge_base is None or not self.features:
                 return 0.0, "unknown"
-                
-            # Find closest crop
-            closest_crop, distance = self.find_closest_crop(state)
-            
-            # Normalize distance - Fix DataFrame boolean context
-            if self.dataset is not None and not self.dataset.empty and self.features:  # Added explicit empty check
-                max_distance = math.sqrt(sum((self.dataset[f].max() - self.dataset[f].min()) ** 2 for f in self.features))
-                distance_score = 1 - (distance / max_distance) if max_distance > 0 else 0
-            else:
-                distance_score = 0
-                
-            # Cost
-            total_cost = sum(chromosome[i] * self.costs.get(action, 0) for i, (action, _) in enumerate(self.interventions) if i < len(chromosome))
-            max_cost = 500  # Estimated max
-            cost_score = 1 - (total_cost / max_cost) if total_cost <= max_cost else 0
-            
-            # Fitness
-            fitness = 0.7 * distance_score + 0.3 * cost_score
-            return fitness, closest_crop
+
+            fitness, closest = self.evaluate_population([chromosome])
+            return float(fitness[0]), self.knowledge_base.profile_names[closest[0]]
         except Exception as e:
-            print(f"Error in evaluate: {e}")
+            logger.error("Error in evaluate: %s", e)
             return 0.0, "unknown"
 
     def compute_all_suitability(self, chromosome):
         """Compute suitability scores for all crops."""
-        if not self.crop_profiles or not self.features or self.dataset is None:
+        if not self.crop_profiles or not self.features or self.knowledge_base is None:
             return {}
             
         try:
-            state = self.apply_interventions(chromosome)
-            
-            # Check if state is None or empty dict
-            if state is None or len(state) == 0:
-                return {}
-                
-            # Fix DataFrame boolean context
-            if self.dataset.empty:  # Use explicit empty check
-                return {}
-                
-            max_distance = math.sqrt(sum((self.dataset[f].max() - self.dataset[f].min()) ** 2 for f in self.features))
-            suitability_scores = {}
-            
-            for crop, means in self.crop_profiles.items():
-                try:
-                    distance = math.sqrt(sum((state.get(f, 0) - means.get(f, 0)) ** 2 for f in self.features))
-                    suitability = (1 - (distance / max_distance)) * 100 if max_distance > 0 else 0  # Convert to percentage
-                    suitability_scores[crop] = max(0, suitability)  # Ensure non-negative
-                except Exception as e:
-                    print(f"Error computing suitability for {crop}: {e}")
-                    suitability_scores[crop] = 0
-                    
-            return suitability_scores
+            distances = self._crop_distances(self._intervened_environments([chromosome]))[0]
+            max_distance = self.knowledge_base.max_distance
+            if max_distance > 0:
+                suitability = np.maximum(0, (1 - (distances / max_distance)) * 100)  # Convert to percentage
+            else:
+                suitability = np.zeros(len(distances))
+            return {crop: float(score) for crop, score in zip(self.knowledge_base.profile_names, suitability)}
         except Exception as e:
-            print(f"Error in compute_all_suitability: {e}")
-            return {}
\ No newline at end of file
+            logger.error("Error in compute_all_suitability: %s", e)
+            return {}
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+CACHE_BACKENDS = ("memory", "sqlite")
+
+
+def make_cache_key(environment, engine, params=None, dataset_version=None, precision=1):
+    """
+    Cache key for one engine run.
+
+    The seven environmental features are rounded to `precision` decimals so
+    near-identical submissions (e.g. repeat queries from the same farm region)
+    share an entry. The engine name, its parameters and the dataset version
+    are part of the key, so changing any of them never returns a stale result.
+    """
+    payload = {
+        'environment': [round(float(value), precision) + 0.0 for value in environment],
+        'engine': engine,
+        'params': params or {},
+        'dataset': dataset_version,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Base class for the engine result caches: hit/miss bookkeeping per engine.
+
+    Subclasses implement _get, _set, clear and __len__.
+    """
+    def __init__(self, max_size=1024, ttl=None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._counts = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, engine, hit):
+        with self._stats_lock:
+            counts = self._counts.setdefault(engine, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def get(self, key, engine=None):
+        """Return the cached value for `key`, or None on a miss or expired entry."""
+        value = self._get(key)
+        self._record(engine, value is not None)
+        return value
+
+    def set(self, key, value):
+        """Store `value` under `key`; None values are not cached."""
+        if value is not None:
+            self._set(key, value)
+
+    @property
+    def stats(self):
+        with self._stats_lock:
+            counts = {engine: tuple(c) for engine, c in self._counts.items()}
+        hits = sum(c[0] for c in counts.values())
+        misses = sum(c[1] for c in counts.values())
+        return {
+            'backend': self.backend,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'size': len(self),
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'engines': {
+                engine: {'hits': h, 'misses': m, 'hit_rate': h / (h + m) if h + m else 0.0}
+                for engine, (h, m) in counts.items() if engine is not None
+            },
+        }
+
+
+class MemoryResultCache(ResultCache):
+    """
+    In-process LRU cache with optional TTL (seconds).
+
+    Values are shared with the caller, not copied, and must not be mutated.
+    """
+    backend = "memory"
+
+    def __init__(self, max_size=1024, ttl=None):
+        super().__init__(max_size, ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteResultCache(ResultCache):
+    """
+    LRU cache with optional TTL stored in a SQLite file.
+
+    Entries survive restarts and are shared by every process using the same
+    file; hit/miss counters are per process. Values are pickled, so only
+    point it at a file this application controls.
+    """
+    backend = "sqlite"
+
+    def __init__(self, path, max_size=10000, ttl=None):
+        super().__init__(max_size, ttl)
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " expires_at REAL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_result_cache_last_access ON result_cache (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def _get(self, key):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value, expires_at FROM result_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                return None
+            conn.execute("UPDATE result_cache SET last_access = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def _set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, expires_at, now),
+            )
+            expired = conn.execute("DELETE FROM result_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                   (now,)).rowcount
+            evicted = conn.execute(
+                "DELETE FROM result_cache WHERE key IN ("
+                " SELECT key FROM result_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            ).rowcount
+        self.expirations += expired
+        self.evictions += evicted
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM result_cache")
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+def create_result_cache(backend="memory", max_size=1024, ttl=None, path=None):
+    """Build a result cache from configuration; backend None disables caching."""
+    if backend is None:
+        return None
+    if backend == "memory":
+        return MemoryResultCache(max_size=max_size, ttl=ttl)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite result cache needs a path")
+        return SQLiteResultCache(path, max_size=max_size, ttl=ttl)
+    raise ValueError(f"Unknown result cache backend '{backend}', expected one of {CACHE_BACKENDS}")
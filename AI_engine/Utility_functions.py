@@ -1,34 +1,12 @@
-
-import pandas as pd
+from AI_engine.Knowledge_base import get_knowledge_base
 
 def get_crop_requirements(file_path=None):
     """
-    Generate sample crop requirements if data file isn't available or has errors
+    Return (crop_requirements, dataset, features, crop_profiles) from the shared
+    crop knowledge base. The CSV is only parsed again when it changes on disk.
     """
-
-
-    df = pd.read_csv(file_path)
-
-
-    if 'label' in df.columns:
-
-        features = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
-        crop_stats = df.groupby('label')[features].agg(['min', 'max'])
-        df = df[features + ['label']].rename(columns={'label': 'Crop_Type'})
-        profiles = {}
-        for crop in df['Crop_Type'].unique():
-            crop_data = df[df['Crop_Type'] == crop]
-            profiles[crop] = {f: crop_data[f].mean() for f in features}
-        crop_requirements = {}
-        for crop in crop_stats.index:
-            feature_ranges = {}
-            for feature in features:
-                        min_val = crop_stats.loc[crop, (feature, 'min')]
-                        max_val = crop_stats.loc[crop, (feature, 'max')]
-                        feature_ranges[feature] = (round(min_val, 1), round(max_val, 1))
-            crop_requirements[crop] = feature_ranges
-
-        return crop_requirements,df, features, profiles
+    kb = get_knowledge_base(file_path)
+    return kb.crop_requirements, kb.dataset, list(kb.features), kb.crop_profiles
 
 agricultural_practices_effects = {
     "add_organic_matter": {
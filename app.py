@@ -2,6 +2,12 @@
 from flask import Flask
 from extensions import db, bcrypt
 from routes import init_routes
+from AI_engine.Knowledge_base import get_knowledge_base, DEFAULT_DATA_FILE
+from AI_engine.Result_cache import create_result_cache
+from AI_engine.Log_config import configure_logging
+from jobs import JobQueue
+import tracing
+import os
 
 def create_app():
     app = Flask(__name__)
@@ -10,12 +16,77 @@ def create_app():
     # Configurations
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///farmeazy.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['CROP_DATA_FILE'] = DEFAULT_DATA_FILE
+    # Per-request limits for A*/Greedy so a hard input can't hold a worker for long
+    app.config['SEARCH_MAX_NODES'] = 20000
+    app.config['SEARCH_TIME_LIMIT'] = 2.0  # seconds
+    # How the four engines run per request: 'process' pool, 'thread' pool or 'serial'
+    app.config['ENGINE_EXECUTOR'] = 'process'
+    app.config['ENGINE_TIMEOUT'] = 30.0  # seconds per engine
+    # GA sub-populations, evolved in parallel on their own process pool
+    app.config['GA_ISLANDS'] = 1
+    # Fixed GA seed so the same input always gets the same recommendation (None = random)
+    app.config['GA_SEED'] = 0
+    # CSP value ordering: 'lcv' (least constraining value first) or 'domain' (cheaper, plain domain order)
+    app.config['CSP_VALUE_ORDER'] = 'lcv'
+    # Engine result cache: 'memory', 'sqlite' (shared across workers and restarts) or None to disable
+    app.config['RESULT_CACHE_BACKEND'] = 'memory'
+    app.config['RESULT_CACHE_SIZE'] = 1024
+    app.config['RESULT_CACHE_TTL'] = 24 * 3600  # seconds
+    app.config['RESULT_CACHE_PATH'] = os.path.join(app.instance_path, 'result_cache.db')
+    # Inputs are rounded to this many decimals before lookup, so near-identical submissions share results
+    app.config['RESULT_CACHE_PRECISION'] = 1
+    # /api/batch scores rows on its own process pool (None = min(4, CPUs) workers)
+    app.config['BATCH_EXECUTOR'] = 'process'
+    app.config['BATCH_WORKERS'] = None
+    # Job mode of /api/predict and /api/classify ('async=1'): 'memory' (this process only) or 'sqlite' (app database)
+    app.config['JOB_BACKEND'] = 'memory'
+    app.config['JOB_WORKERS'] = 2
+    app.config['JOB_MAX_QUEUED'] = 100
+    app.config['JOB_TTL'] = 3600  # seconds finished jobs stay available for polling
+    # Server-sent events for live result pages: how often to check a job and how long to stream
+    app.config['JOB_EVENTS_POLL'] = 0.2  # seconds
+    app.config['JOB_EVENTS_TIMEOUT'] = 300  # seconds
+    # Log level of the engines, routes and jobs, with per-module overrides, e.g. {'AI_engine.Genetic': 'DEBUG'}
+    app.config['LOG_LEVEL'] = 'WARNING'
+    app.config['LOG_LEVELS'] = {}
+    app.config['LOG_RATE_LIMIT'] = 60.0  # seconds between repeats of the same warning (0 = log every one)
+    # One structured (JSON) log line per request and job, with the time spent in each phase, on the
+    # 'tracing.requests' logger at INFO (off by default; LOG_LEVELS can still override its level)
+    app.config['TRACE_REQUESTS'] = False
+    app.config['TRACE_MIN_DURATION_MS'] = 0  # only log requests at least this slow
+    # cProfile single requests that send PROFILE_HEADER (with PROFILE_TOKEN as its value, if set)
+    app.config['PROFILING_ENABLED'] = False
+    app.config['PROFILE_HEADER'] = 'X-Profile'
+    app.config['PROFILE_TOKEN'] = None
+    app.config['PROFILE_DIR'] = os.path.join(app.instance_path, 'profiles')
+
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_LEVELS'], app.config['LOG_RATE_LIMIT'])
 
     # Initialize extensions
     db.init_app(app)
     bcrypt.init_app(app)
 
+    # Load the crop knowledge base once so the first request doesn't pay for it
+    get_knowledge_base(app.config['CROP_DATA_FILE'])
+
+    app.extensions['result_cache'] = create_result_cache(
+        app.config['RESULT_CACHE_BACKEND'],
+        max_size=app.config['RESULT_CACHE_SIZE'],
+        ttl=app.config['RESULT_CACHE_TTL'],
+        path=app.config['RESULT_CACHE_PATH'],
+    )
+
     # Register Blueprints
     init_routes(app)
+    tracing.init_app(app)
+
+    app.extensions['job_queue'] = JobQueue(
+        app,
+        backend=app.config['JOB_BACKEND'],
+        max_workers=app.config['JOB_WORKERS'],
+        max_queued=app.config['JOB_MAX_QUEUED'],
+        ttl=app.config['JOB_TTL'],
+    )
 
     return app
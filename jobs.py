@@ -0,0 +1,188 @@
+# jobs.py
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import Job, PredictionResult
+from tracing import span, traced
+from AI_engine.Log_config import get_logger
+
+logger = get_logger(__name__)
+
+JOB_BACKENDS = ("memory", "sqlite")
+FINISHED = ("done", "failed")
+
+# kind -> function(environmental_data, on_result) returning the formatted results;
+# registered by the route modules ('prediction', 'classification')
+RUNNERS = {}
+
+
+def register_runner(kind, runner):
+    RUNNERS[kind] = runner
+
+
+class QueueFullError(RuntimeError):
+    """Raised by JobQueue.submit when too many jobs are waiting."""
+
+
+class MemoryJobStore:
+    """Job records in a dict; only visible to the process that created them."""
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job['id']] = job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else dict(job, results=dict(job['results']))
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def add_result(self, job_id, engine, result):
+        with self._lock:
+            self._jobs[job_id]['results'][engine] = result
+
+    def prune(self, before):
+        with self._lock:
+            for job_id in [j['id'] for j in self._jobs.values() if j['status'] in FINISHED and j['created_at'] < before]:
+                del self._jobs[job_id]
+
+    def interrupt_unfinished(self):
+        return 0
+
+
+class SQLiteJobStore:
+    """Job records in the app database (the Job table), shared by every process using it."""
+    def create(self, job):
+        db.session.add(Job(id=job['id'], user_id=job['user_id'], kind=job['kind'], status=job['status'],
+                           input_data=json.dumps(job['input']), partial_results='{}', created_at=job['created_at']))
+        db.session.commit()
+
+    def get(self, job_id):
+        # Always re-read: pollers call this repeatedly while another thread updates the row
+        job = Job.query.filter_by(id=job_id).populate_existing().first()
+        db.session.commit()
+        return None if job is None else job.to_dict()
+
+    def update(self, job_id, **fields):
+        Job.query.filter_by(id=job_id).update(fields)
+        db.session.commit()
+
+    def add_result(self, job_id, engine, result):
+        # Only the job's own worker writes its results, so read-modify-write is safe
+        job = Job.query.get(job_id)
+        results = json.loads(job.partial_results)
+        results[engine] = result
+        job.partial_results = json.dumps(results)
+        db.session.commit()
+
+    def prune(self, before):
+        Job.query.filter(Job.status.in_(FINISHED), Job.created_at < before).delete(synchronize_session=False)
+        db.session.commit()
+
+    def interrupt_unfinished(self):
+        """Fail jobs left queued/running by a previous process; their workers are gone."""
+        count = Job.query.filter(~Job.status.in_(FINISHED)).update(
+            {'status': 'failed', 'error': 'Interrupted by a server restart, please submit again'},
+            synchronize_session=False)
+        db.session.commit()
+        return count
+
+
+class JobQueue:
+    """
+    Runs recommendation jobs on a local pool of worker threads.
+
+    Each worker pushes an app context and calls the runner registered for the
+    job's kind, so engines still run on the shared engine pool. Per-engine
+    results are recorded as they arrive; when all are in, the results are
+    saved as a PredictionResult and the job is marked done.
+    """
+    def __init__(self, app, backend="memory", max_workers=2, max_queued=100, ttl=3600):
+        if backend not in JOB_BACKENDS:
+            raise ValueError(f"Unknown job backend '{backend}', expected one of {JOB_BACKENDS}")
+        self.app = app
+        self.store = SQLiteJobStore() if backend == "sqlite" else MemoryJobStore()
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+        self._active = 0
+        self._lock = threading.Lock()
+
+        if backend == "sqlite":
+            with app.app_context():
+                db.create_all()
+                interrupted = self.store.interrupt_unfinished()
+            if interrupted:
+                logger.warning("Marked %d unfinished jobs as failed", interrupted)
+
+    def submit(self, kind, environmental_data, user_id=None):
+        """Queue a job and return its id; raises QueueFullError when too many are waiting."""
+        if kind not in RUNNERS:
+            raise ValueError(f"No runner registered for job kind '{kind}'")
+        with self._lock:
+            if self._active >= self.max_queued:
+                raise QueueFullError("Too many jobs in progress, please try again shortly")
+            self._active += 1
+
+        job_id = uuid.uuid4().hex
+        created = False
+        try:
+            now = datetime.utcnow()
+            self.store.prune(now - timedelta(seconds=self.ttl))
+            self.store.create({'id': job_id, 'user_id': user_id, 'kind': kind, 'status': 'queued',
+                               'input': environmental_data, 'results': {}, 'result_id': None, 'error': None,
+                               'created_at': now})
+            created = True
+            self._pool.submit(self._run, job_id, kind, environmental_data, user_id)
+        except BaseException:
+            # The job never reached a worker, so nothing else will free its slot
+            with self._lock:
+                self._active -= 1
+            if created:
+                self.store.update(job_id, status='failed', error='Could not be queued, please submit again')
+            raise
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def get_for(self, job_id, user_id=None):
+        """The job if `user_id` may see it (anonymous jobs are visible to anyone holding the id)."""
+        job = self.store.get(job_id)
+        if job is None or (job['user_id'] is not None and job['user_id'] != user_id):
+            return None
+        return job
+
+    def _run(self, job_id, kind, environmental_data, user_id):
+        try:
+            with self.app.app_context(), traced('job', job_id=job_id, kind=kind) as trace:
+                try:
+                    self.store.update(job_id, status='running')
+                    results = RUNNERS[kind](
+                        environmental_data,
+                        on_result=lambda engine, result: self.store.add_result(job_id, engine, result))
+                    with span('db.save'):
+                        result = PredictionResult.create(kind, environmental_data, results, user_id=user_id)
+                        db.session.commit()
+                    self.store.update(job_id, status='done', result_id=result.id)
+                except Exception as e:
+                    db.session.rollback()
+                    trace.attrs['status'] = 'failed'
+                    logger.error("Job %s failed: %s", job_id, e)
+                    self.store.update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -1,4 +1,5 @@
 # models.py
+import json
 from extensions import db
 from datetime import datetime
 
@@ -13,9 +14,69 @@ class User(db.Model):
         return f'<User {self.email}>'
 
 class PredictionResult(db.Model):
+    # History pages list a user's results newest first
+    __table_args__ = (db.Index('ix_prediction_result_user_created', 'user_id', 'created_at'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     algorithm = db.Column(db.String(50), nullable=False)
     input_data = db.Column(db.Text, nullable=False)
     result_data = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def create(cls, algorithm, environmental_data, results, user_id=None):
+        """Add a result row for one submission ('prediction' or 'classification'); the caller commits."""
+        result = cls(
+            user_id=user_id,
+            algorithm=algorithm,
+            input_data=json.dumps(environmental_data),
+            result_data=json.dumps(results),
+        )
+        db.session.add(result)
+        return result
+
+    @classmethod
+    def history(cls, user_id, algorithm=None, limit=20):
+        """Most recent results of a user, served by the (user_id, created_at) index."""
+        query = cls.query.filter_by(user_id=user_id)
+        if algorithm:
+            query = query.filter_by(algorithm=algorithm)
+        return query.order_by(cls.created_at.desc()).limit(limit).all()
+
+    @property
+    def data(self):
+        """The {'input': [...], 'results': {...}} structure the result templates render."""
+        return {'input': json.loads(self.input_data), 'results': json.loads(self.result_data)}
+
+    def __repr__(self):
+        return f'<PredictionResult {self.id} {self.algorithm}>'
+
+class Job(db.Model):
+    """A queued /api/predict or /api/classify run (see jobs.py)."""
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    input_data = db.Column(db.Text, nullable=False)
+    partial_results = db.Column(db.Text, nullable=False, default='{}')
+    result_id = db.Column(db.Integer, db.ForeignKey('prediction_result.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'kind': self.kind,
+            'status': self.status,
+            'input': json.loads(self.input_data),
+            'results': json.loads(self.partial_results),
+            'result_id': self.result_id,
+            'error': self.error,
+            'created_at': self.created_at,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
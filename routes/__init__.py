@@ -4,9 +4,15 @@ from .auth_routes import auth_bp
 from .main_routes import main_bp
 from .classification_routes import classification_bp
 from .prediction_routes import prediction_bp
+from .batch_routes import batch_bp
+from .job_routes import jobs_bp
+from .metrics_routes import metrics_bp
 
 def init_routes(app):
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(classification_bp)
-    app.register_blueprint(prediction_bp)
\ No newline at end of file
+    app.register_blueprint(prediction_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
\ No newline at end of file
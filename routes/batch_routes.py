@@ -0,0 +1,66 @@
+import io
+import shutil
+import tempfile
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from AI_engine.Batch_runner import ENGINES, INPUT_FORMATS, detect_format, read_environments, run_batch, to_json_line
+
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('/api/batch', methods=['POST'])
+def batch_predict():
+    """
+    Score a CSV or JSON-lines file of environments.
+
+    Send the file as the multipart field 'file' or as the raw request body.
+    Query parameters: engines (comma-separated, default all four), mode
+    ('predict' or 'classify') and format ('csv' or 'jsonl', default from the
+    file name). Results stream back as JSON lines, one per input row.
+    """
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or detect_format(upload.filename if upload else None)
+    mode = request.args.get('mode', 'predict')
+    engines = [e.strip() for e in request.args.get('engines', ','.join(ENGINES)).split(',') if e.strip()]
+
+    if fmt not in INPUT_FORMATS:
+        return jsonify({'success': False, 'message': f'Unknown format, expected one of {list(INPUT_FORMATS)}'}), 400
+    if mode not in ('predict', 'classify'):
+        return jsonify({'success': False, 'message': "mode must be 'predict' or 'classify'"}), 400
+    unknown = [e for e in engines if e not in ENGINES]
+    if not engines or unknown:
+        return jsonify({'success': False, 'message': f'Unknown engines {unknown}, expected a subset of {list(ENGINES)}'}), 400
+
+    if upload:
+        # Werkzeug closes uploaded files when the view returns, before the
+        # response is streamed, so spool the upload to a file we own
+        spooled = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload.stream, spooled)
+        spooled.seek(0)
+        source = io.TextIOWrapper(spooled, encoding='utf-8', newline='')
+    else:
+        source = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+
+    results = run_batch(
+        read_environments(source, fmt),
+        engines=engines,
+        mode=mode,
+        max_workers=current_app.config.get('BATCH_WORKERS'),
+        data_file=current_app.config.get('CROP_DATA_FILE'),
+        search_limits={
+            'max_depth': 4,
+            'max_nodes': current_app.config.get('SEARCH_MAX_NODES'),
+            'time_limit': current_app.config.get('SEARCH_TIME_LIMIT'),
+        },
+        ga_params={'seed': current_app.config.get('GA_SEED')},
+        csp_params={'value_order': current_app.config.get('CSP_VALUE_ORDER', 'lcv')},
+        executor=current_app.config.get('BATCH_EXECUTOR', 'process'),
+    )
+
+    def generate():
+        try:
+            for row in results:
+                yield to_json_line(row)
+        finally:
+            if upload:
+                source.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
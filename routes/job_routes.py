@@ -0,0 +1,82 @@
+import json
+import time
+from flask import Blueprint, jsonify, session, url_for, current_app, render_template, Response, stream_with_context
+from .main_routes import RESULT_PAGES
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Poll a job: status, the engine results finished so far and, once done, the result page."""
+    job = current_app.extensions['job_queue'].get_for(job_id, session.get('user_id'))
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+
+    response = {
+        'success': True,
+        'job_id': job['id'],
+        'type': job['kind'],
+        'status': job['status'],
+        'results': job['results'],
+        'error': job['error'],
+    }
+    if job['status'] == 'done':
+        # Anonymous results are only viewable from the session that asked for them
+        session[f"{job['kind']}_result_id"] = job['result_id']
+        response['redirect'] = url_for(RESULT_PAGES[job['kind']], result_id=job['result_id'])
+    return jsonify(response)
+
+
+def render_engine_card(kind, engine, result):
+    """Render one engine's result card exactly as the full result page would."""
+    return render_template(f'includes/{kind}_{engine}.html', **{f'{kind}_data': {'results': {engine: result}}})
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@jobs_bp.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Server-sent events for a job: one 'engine' event per engine as soon as it
+    finishes (with the rendered card), then 'done' or 'failed'.
+    """
+    queue = current_app.extensions['job_queue']
+    if queue.get_for(job_id, session.get('user_id')) is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+
+    poll_interval = current_app.config.get('JOB_EVENTS_POLL', 0.2)
+    time_limit = current_app.config.get('JOB_EVENTS_TIMEOUT', 300)
+
+    def generate():
+        sent = set()
+        start = last_write = time.monotonic()
+        while True:
+            job = queue.get(job_id)
+            if job is None:
+                yield _event('failed', {'error': 'Job expired'})
+                return
+            for engine, result in job['results'].items():
+                if engine not in sent:
+                    sent.add(engine)
+                    last_write = time.monotonic()
+                    yield _event('engine', {'engine': engine, 'result': result,
+                                            'html': render_engine_card(job['kind'], engine, result)})
+            if job['status'] == 'done':
+                yield _event('done', {'redirect': url_for(RESULT_PAGES[job['kind']], result_id=job['result_id'])})
+                return
+            if job['status'] == 'failed':
+                yield _event('failed', {'error': job['error']})
+                return
+            if time.monotonic() - start > time_limit:
+                yield _event('failed', {'error': 'Timed out waiting for results'})
+                return
+            if time.monotonic() - last_write > 15:
+                # Comment line keeps proxies from closing an idle stream
+                last_write = time.monotonic()
+                yield ": keep-alive\n\n"
+            time.sleep(poll_interval)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,8 +1,14 @@
-from flask import Blueprint, render_template, session, flash, redirect, url_for
-from models import User
+from flask import Blueprint, render_template, request, session, flash, redirect, url_for, jsonify, current_app
+from models import User, PredictionResult
 
 main_bp = Blueprint('main', __name__)
 
+# Result page endpoint for each PredictionResult.algorithm
+RESULT_PAGES = {
+    'prediction': 'prediction.prediction_results',
+    'classification': 'classification.classification_results',
+}
+
 @main_bp.route('/')
 def index():
     return render_template('index.html')
@@ -22,4 +28,28 @@ def profile():
         return redirect(url_for('main.login_page'))
 
     user = User.query.get(session['user_id'])
-    return render_template('Profile.html', user=user)
\ No newline at end of file
+    return render_template('Profile.html', user=user)
+
+@main_bp.route('/api/history')
+def history():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login to view your history'}), 401
+
+    results = PredictionResult.history(session['user_id'], algorithm=request.args.get('type'),
+                                       limit=max(1, min(request.args.get('limit', 20, type=int), 100)))
+    return jsonify({'success': True, 'results': [
+        {
+            'id': result.id,
+            'type': result.algorithm,
+            'created_at': result.created_at.isoformat(),
+            'url': url_for(RESULT_PAGES[result.algorithm], result_id=result.id) if result.algorithm in RESULT_PAGES else None,
+        }
+        for result in results
+    ]})
+
+@main_bp.route('/api/cache-stats')
+def cache_stats():
+    cache = current_app.extensions.get('result_cache')
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **cache.stats})
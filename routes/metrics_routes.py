@@ -0,0 +1,63 @@
+import time
+from flask import Blueprint, Response, current_app, g, request
+from AI_engine import Metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+Metrics.define("crop_http_requests_total", "counter", "HTTP requests by route, method and status.")
+Metrics.define("crop_http_request_errors_total", "counter", "HTTP requests that ended in a server error, by route.")
+Metrics.define("crop_http_request_duration_seconds", "histogram",
+               "Time to build the response (streamed bodies excluded), by route.", Metrics.LATENCY_BUCKETS)
+
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def count_request(response):
+    # Also runs for unhandled exceptions, with the 500 response Flask built for them
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    Metrics.inc("crop_http_requests_total", route=route, method=request.method, status=response.status_code)
+    if response.status_code >= 500:
+        Metrics.inc("crop_http_request_errors_total", route=route)
+    started = g.get('request_started')
+    if started is not None:
+        Metrics.observe("crop_http_request_duration_seconds", time.perf_counter() - started, route=route)
+    return response
+
+
+def _cache_metrics():
+    """Result cache counters, read from the cache's own statistics at scrape time."""
+    cache = current_app.extensions.get('result_cache')
+    if cache is None:
+        return []
+    stats = cache.stats
+    requests = []
+    ratios = []
+    for engine, counts in sorted(stats['engines'].items()):
+        requests.append(((('engine', engine), ('result', 'hit')), counts['hits']))
+        requests.append(((('engine', engine), ('result', 'miss')), counts['misses']))
+        ratios.append(((('engine', engine),), counts['hit_rate']))
+    backend = (('backend', stats['backend']),)
+    return [
+        *Metrics.format_metric("crop_result_cache_requests_total", "counter",
+                               "Result cache lookups by engine and result.", requests),
+        *Metrics.format_metric("crop_result_cache_hit_ratio", "gauge",
+                               "Share of result cache lookups that were hits, by engine.", ratios),
+        *Metrics.format_metric("crop_result_cache_entries", "gauge", "Entries in the result cache.",
+                               [(backend, stats['size'])]),
+        *Metrics.format_metric("crop_result_cache_evictions_total", "counter",
+                               "Result cache entries evicted to stay within the size limit.",
+                               [(backend, stats['evictions'])]),
+        *Metrics.format_metric("crop_result_cache_expirations_total", "counter",
+                               "Result cache entries dropped after their TTL.", [(backend, stats['expirations'])]),
+    ]
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Engine, cache and request metrics of this server process in the Prometheus text format."""
+    body = Metrics.REGISTRY.render() + "".join(line + "\n" for line in _cache_metrics())
+    return Response(body, mimetype='text/plain; version=0.0.4')
@@ -1,15 +1,18 @@
+import copy
+import logging
 import numpy as np
-from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for
-from AI_engine.Problem_definition import CropPredictionProblem
-from AI_engine.Astar_Greedy import GraphSearch
-from AI_engine.Genetic import GeneticAlgorithm
-from AI_engine.CSP import run_csp
-import os
+from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for, current_app
+from AI_engine.Problem_definition import CropPredictionProblem, CropState
+from AI_engine.Engine_runner import run_engines, run_search, run_genetic, run_constraint_solver, search_completed
+from AI_engine.Result_cache import make_cache_key
+from extensions import db
+from models import PredictionResult
+from jobs import register_runner, QueueFullError
+from tracing import span, record_span, profiling_active
+from AI_engine.Log_config import get_logger
 
 prediction_bp = Blueprint('prediction', __name__)
-
-# Create a constant for the data directory
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+logger = get_logger(__name__)
 
 def convert_numpy_types(obj):
     """Recursively convert NumPy types to native Python types for JSON serialization."""
@@ -30,6 +33,353 @@ def convert_numpy_types(obj):
     else:
         return obj
 
+EMPTY_RESULTS = {
+    'astar': {
+        'success': False,
+        'perfect_match': None,
+        'recommendations': [],
+        'message': '',
+        'error': None
+    },
+    'greedy': {  
+        'success': False,
+        'perfect_match': None,
+        'recommendations': [],
+        'message': '',
+        'error': None
+    },
+    'genetic': {
+        'success': False,
+        'best_crop': None,
+        'fitness': 0,
+        'interventions': {},
+        'message': '',
+        'error': None
+    },
+    'csp': {  
+        'success': False,
+        'message': '',
+        'data': None,
+        'error': None
+    }
+}
+
+
+def _format_astar(outcome, problem):
+    """A* Search outcome -> result dict for the template."""
+    logger.debug("Processing A* Search results")
+    try:
+        node, crop_or_list, cost, search_stats = outcome.result()
+        logger.debug("A* Search completed. Result: %s, Cost: %s", crop_or_list, cost)
+
+        if node and isinstance(crop_or_list, str):
+            # Perfect match found
+            result = {
+                'success': True,
+                'perfect_match': {
+                    'crop': crop_or_list.title(),
+                    'cost': round(float(cost), 2) if cost else 0
+                },
+                'recommendations': [],
+                'message': f'Perfect match found: {crop_or_list.title()}',
+                'error': None
+            }
+            logger.debug("A* Perfect match: %s", crop_or_list)
+        elif isinstance(crop_or_list, list) and len(crop_or_list) > 0:
+            # Alternative recommendations
+            recommendations = []
+            if crop_or_list:
+                item = crop_or_list[0]   # just take the first item
+                if isinstance(item, tuple) and len(item) >= 3:
+                    crop, alt_cost, node_item = item
+                    recommendations.append({
+                        'crop': crop.title() if isinstance(crop, str) else str(crop),
+                        'cost': round(float(alt_cost), 2) if alt_cost else 0
+                    })
+
+            result = {
+                'success': True,
+                'perfect_match': None,
+                'recommendations': recommendations,
+                'message': 'No perfect match found, showing best alternative',
+                'truncated': search_stats.get('truncated', False),
+                'error': None
+            }
+
+        else:
+            result = {
+                'success': False,
+                'perfect_match': None,
+                'recommendations': [],
+                'message': 'No suitable crop found with A* search',
+                'error': None
+            }
+            logger.info("A* No results found")
+    except Exception as e:
+        error_msg = str(e)
+        logger.warning("A* Search Error: %s", error_msg)
+        result = {
+            'success': False,
+            'error': error_msg,
+            'perfect_match': None,
+            'recommendations': [],
+            'message': f'Error in A* search: {error_msg}'
+        }
+    return result
+
+
+def _format_greedy(outcome, problem):
+    """Greedy Search outcome -> result dict for the template."""
+    logger.debug("Processing Greedy Search results")
+    try:
+        node, crop_or_list, cost, search_stats = outcome.result()
+        logger.debug("Greedy Search completed. Result: %s, Cost: %s", crop_or_list, cost)
+
+        if node and isinstance(crop_or_list, str):
+            # Perfect match found
+            result = {
+                'success': True,
+                'perfect_match': {
+                    'crop': crop_or_list.title(),
+                    'cost': round(float(cost), 2) if cost else 0
+                },
+                'recommendations': [],
+                'message': f'Perfect match found: {crop_or_list.title()}',
+                'error': None
+            }
+            logger.debug("Greedy Perfect match: %s", crop_or_list)
+        elif isinstance(crop_or_list, list) and len(crop_or_list) > 0:
+            # Alternative recommendations
+            recommendations = []
+            if crop_or_list:
+                item = crop_or_list[0]   # just take the first item
+                if isinstance(item, tuple) and len(item) >= 3:
+                    crop, alt_cost, node_item = item
+                    recommendations.append({
+                        'crop': crop.title() if isinstance(crop, str) else str(crop),
+                        'cost': round(float(alt_cost), 2) if alt_cost else 0
+                    })
+
+            result = {
+                'success': True,
+                'perfect_match': None,
+                'recommendations': recommendations,
+                'message': 'No perfect match found, showing best alternative',
+                'truncated': search_stats.get('truncated', False),
+                'error': None
+            }
+            logger.debug("Greedy Alternatives: %d found", len(recommendations))
+        else:
+            result = {
+                'success': False,
+                'perfect_match': None,
+                'recommendations': [],
+                'message': 'No suitable crop found with Greedy search',
+                'error': None
+            }
+            logger.info("Greedy No results found")
+    except Exception as e:
+        error_msg = str(e)
+        logger.warning("Greedy Search Error: %s", error_msg)
+        result = {
+            'success': False,
+            'error': error_msg,
+            'perfect_match': None,
+            'recommendations': [],
+            'message': f'Error in Greedy search: {error_msg}'
+        }
+    return result
+
+
+def _format_genetic(outcome, problem):
+    """Genetic Algorithm outcome -> result dict for the template."""
+    logger.debug("Processing Genetic Algorithm results")
+    try:
+        best_solution, best_fitness, best_crop, top_crops = outcome.result()
+        logger.debug("GA completed. Best crop: %s, Fitness: %s", best_crop, best_fitness)
+
+        if best_solution and best_crop:
+            formatted_interventions = {}
+            if hasattr(problem, 'interventions') and problem.interventions:
+                for i, (intervention_name, _) in enumerate(problem.interventions):
+                    if i < len(best_solution):
+                        formatted_interventions[intervention_name] = round(float(best_solution[i]), 1)
+
+            result = {
+                'success': True,
+                'best_crop': best_crop.title() if isinstance(best_crop, str) else str(best_crop),
+                'fitness': round(float(best_fitness), 4),
+                'interventions': formatted_interventions,
+                'message': f'Best crop with interventions: {best_crop.title() if isinstance(best_crop, str) else str(best_crop)}',
+                'error': None
+            }
+
+        else:
+            result = {
+                'success': False,
+                'best_crop': None,
+                'fitness': 0,
+                'interventions': {},
+                'message': 'Genetic algorithm did not find optimal solution',
+                'error': None
+            }
+    except Exception as e:
+        error_msg = str(e)
+        logger.warning("Genetic Algorithm Error: %s", error_msg)
+        result = {
+            'success': False,
+            'error': error_msg,
+            'best_crop': None,
+            'fitness': 0,
+            'interventions': {},
+            'message': f'Error in genetic algorithm: {error_msg}'
+        }
+    return result
+
+
+def _format_csp(outcome, problem):
+    """CSP outcome -> result dict for the template."""
+    logger.debug("Processing CSP results")
+    try:
+        csp_result = outcome.result()
+        logger.debug("CSP completed")
+
+        if csp_result:
+            # Get the top crop from alternative_crops
+            alternative_crops = csp_result.get('alternative_crops', {})
+            if alternative_crops:
+                # Sort crops by percentage suitability and get the top one
+                sorted_crops = sorted(alternative_crops.items(), 
+                                    key=lambda x: x[1]['percentage'], 
+                                    reverse=True)
+                top_crop_name, top_crop_data = sorted_crops[0]
+
+                # Create a simplified CSP result with just the top recommendation
+                simplified_csp_result = {
+                    'crop': top_crop_name.title(),
+                    'suitability_percentage': round(top_crop_data['percentage'], 1),
+                    'matching_conditions': [],
+                    'non_matching_conditions': [],
+                    'solution': csp_result.get('solution', {}),
+                    'resources': csp_result.get('resources', {}),
+                    'environment': csp_result.get('environment', {}),
+
+                }
+
+                # Parse the details to separate matching vs non-matching conditions
+                for detail in top_crop_data.get('details', []):
+                    if '✓' in detail:
+                        simplified_csp_result['matching_conditions'].append(detail)
+                    else:
+                        simplified_csp_result['non_matching_conditions'].append(detail)
+
+                # Convert to ensure JSON serialization
+                serializable_csp_result = convert_numpy_types(simplified_csp_result)
+
+                result = {
+                    'success': True,
+                    'message': f'Best crop recommendation: {top_crop_name.title()}',
+                    'data': serializable_csp_result
+                }
+            else:
+                result = {
+                    'success': False,
+                    'message': 'No suitable crops found',
+                    'data': None
+                }
+        else:
+            result = {
+                'success': False,
+                'message': 'CSP did not find a solution',
+                'data': None
+            }
+    except Exception as e:
+        error_msg = str(e)
+        logger.warning("CSP Error: %s", error_msg)
+        result = {
+            'success': False,
+            'error': error_msg,
+            'message': f'Error in CSP: {error_msg}'
+        }
+    return result
+
+
+ENGINE_FORMATTERS = {
+    'astar': _format_astar,
+    'greedy': _format_greedy,
+    'genetic': _format_genetic,
+    'csp': _format_csp,
+}
+
+
+def run_prediction(environmental_data, on_result=None):
+    """
+    Run A*, Greedy, GA and CSP on one environment and return their results
+    formatted for `prediction_result.html`. on_result(engine, result) is called
+    as each engine finishes. Needs an app context (config and result cache).
+    """
+    with span('problem'):
+        problem = CropPredictionProblem(CropState(environmental_data), current_app.config.get('CROP_DATA_FILE'))
+    results = copy.deepcopy(EMPTY_RESULTS)
+
+    def _on_outcome(outcome):
+        record_span(f'engine.{outcome.name}', outcome.elapsed, ok=outcome.ok, cached=outcome.cached)
+        with span(f'format.{outcome.name}'):
+            formatted = ENGINE_FORMATTERS[outcome.name](outcome, problem)
+        with span(f'convert_numpy_types.{outcome.name}'):
+            results[outcome.name] = convert_numpy_types(formatted)
+        if on_result is not None:
+            on_result(outcome.name, results[outcome.name])
+
+    # Run the four engines concurrently on one shared problem snapshot
+    search_limits = {
+        'max_depth': 4,
+        'max_nodes': current_app.config.get('SEARCH_MAX_NODES'),
+        'time_limit': current_app.config.get('SEARCH_TIME_LIMIT'),
+    }
+    ga_params = {'islands': current_app.config.get('GA_ISLANDS', 1), 'seed': current_app.config.get('GA_SEED')}
+    jobs = {
+        'astar': (run_search, (problem, "A*"), search_limits),
+        'greedy': (run_search, (problem, "Greedy_search"), search_limits),
+        'genetic': (run_genetic, (problem, "predict"), ga_params),
+        'csp': (run_constraint_solver, (environmental_data,), {
+            'knowledge_base': problem.knowledge_base,
+            'value_order': current_app.config.get('CSP_VALUE_ORDER', 'lcv'),
+        }),
+    }
+    # Repeat (or near-identical) inputs are answered from the result cache; the
+    # knowledge base is part of the key through its version
+    cache_keys = {
+        name: make_cache_key(environmental_data, name,
+                             {'args': args[1:], **{k: v for k, v in kwargs.items() if k != 'knowledge_base'}},
+                             problem.knowledge_base.version, current_app.config.get('RESULT_CACHE_PRECISION', 1))
+        for name, (_, args, kwargs) in jobs.items()
+    }
+    executor = current_app.config.get('ENGINE_EXECUTOR', 'process')
+    cache = current_app.extensions.get('result_cache')
+    if profiling_active():
+        # Run the engines in this thread, uncached, so the request's profile includes them
+        executor, cache = 'serial', None
+    with span('engines', executor=executor):
+        outcomes = run_engines(
+            jobs,
+            executor=executor,
+            timeout=current_app.config.get('ENGINE_TIMEOUT'),
+            cache=cache,
+            cache_keys=cache_keys,
+            on_outcome=_on_outcome,
+            # A search cut short by its limits depends on load at the time, so it isn't cached
+            cacheable={'astar': search_completed, 'greedy': search_completed},
+            # A GA with islands coordinates from a thread here and runs its islands on its own process pool
+            executors={'genetic': 'thread'} if ga_params['islands'] > 1 else None,
+        )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Engines served from cache: %s", [name for name, outcome in outcomes.items() if outcome.cached])
+    return results
+
+
+register_runner('prediction', run_prediction)
+
 @prediction_bp.route('/prediction')
 def prediction_page():
     return render_template('prediction.html')
@@ -61,299 +411,71 @@ def predict_crop():
         if environmental_data[6] < 20:
             return jsonify({'success': False, 'message': 'Rainfall must be greater than 20mm'}), 400
 
-        print(f"Processing environmental data: {environmental_data}")
+        logger.info("Processing environmental data: %s", environmental_data)
 
-        # Create the problem instance
-        try:
-            from AI_engine.Problem_definition import CropState
-            initial_state = CropState(environmental_data)
-            problem = CropPredictionProblem(initial_state, os.path.join(DATA_DIR, 'Crop_Data.csv'))
-            print(f"Problem created successfully.")
-        except Exception as e:
-            print(f"Error creating problem: {str(e)}")
-            return jsonify({'success': False, 'message': f'Error initializing problem: {str(e)}'}), 500
-
-        results = {
-            'astar': {
-                'success': False,
-                'perfect_match': None,
-                'recommendations': [],
-                'message': '',
-                'error': None
-            },
-            'greedy': {  
-                'success': False,
-                'perfect_match': None,
-                'recommendations': [],
-                'message': '',
-                'error': None
-            },
-            'genetic': {
-                'success': False,
-                'best_crop': None,
-                'fitness': 0,
-                'interventions': {},
-                'message': '',
-                'error': None
-            },
-            'csp': {  
-                'success': False,
-                'message': '',
-                'data': None,
-                'error': None
-            }
-        }
-
-        # --- A* Search ---
-        print("Starting A* Search...")
-        try:
-            graph_search = GraphSearch(problem)
-            node, crop_or_list, cost = graph_search.search("A*", max_depth=4)
-            print(f"A* Search completed. Result: {crop_or_list}, Cost: {cost}")
-
-            if node and isinstance(crop_or_list, str):
-                # Perfect match found
-                results['astar'] = {
-                    'success': True,
-                    'perfect_match': {
-                        'crop': crop_or_list.title(),
-                        'cost': round(float(cost), 2) if cost else 0
-                    },
-                    'recommendations': [],
-                    'message': f'Perfect match found: {crop_or_list.title()}',
-                    'error': None
-                }
-                print(f"A* Perfect match: {crop_or_list}")
-            elif isinstance(crop_or_list, list) and len(crop_or_list) > 0:
-                # Alternative recommendations
-                recommendations = []
-                if crop_or_list:
-                    item = crop_or_list[0]   # just take the first item
-                    if isinstance(item, tuple) and len(item) >= 3:
-                        crop, alt_cost, node_item = item
-                        recommendations.append({
-                            'crop': crop.title() if isinstance(crop, str) else str(crop),
-                            'cost': round(float(alt_cost), 2) if alt_cost else 0
-                        })
-
-                results['astar'] = {
-                    'success': True,
-                    'perfect_match': None,
-                    'recommendations': recommendations,
-                    'message': 'No perfect match found, showing best alternative',
-                    'error': None
-                }
-                
-            else:
-                results['astar'] = {
-                    'success': False,
-                    'perfect_match': None,
-                    'recommendations': [],
-                    'message': 'No suitable crop found with A* search',
-                    'error': None
-                }
-                print("A* No results found")
-        except Exception as e:
-            error_msg = str(e)
-            print(f"A* Search Error: {error_msg}")
-            results['astar'] = {
-                'success': False,
-                'error': error_msg,
-                'perfect_match': None,
-                'recommendations': [],
-                'message': f'Error in A* search: {error_msg}'
-            }
-            
-        # --- Greedy Search ---
-        print("Starting Greedy Search...")
-        try:
-            graph_search = GraphSearch(problem)
-            node, crop_or_list, cost = graph_search.search("Greedy_search", max_depth=4)
-            print(f"Greedy Search completed. Result: {crop_or_list}, Cost: {cost}")
+        if request.values.get('async') in ('1', 'true'):
+            # Job mode: answer with a job id straight away and let the client poll
+            try:
+                job_id = current_app.extensions['job_queue'].submit('prediction', environmental_data, user_id=session.get('user_id'))
+            except QueueFullError as e:
+                return jsonify({'success': False, 'message': str(e)}), 503
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status_url': url_for('jobs.job_status', job_id=job_id),
+                'events_url': url_for('jobs.job_events', job_id=job_id),
+                'redirect': url_for('prediction.prediction_live_results', job_id=job_id),
+            }), 202
 
-            if node and isinstance(crop_or_list, str):
-                # Perfect match found
-                results['greedy'] = {
-                    'success': True,
-                    'perfect_match': {
-                        'crop': crop_or_list.title(),
-                        'cost': round(float(cost), 2) if cost else 0
-                    },
-                    'recommendations': [],
-                    'message': f'Perfect match found: {crop_or_list.title()}',
-                    'error': None
-                }
-                print(f"Greedy Perfect match: {crop_or_list}")
-            elif isinstance(crop_or_list, list) and len(crop_or_list) > 0:
-                # Alternative recommendations
-                recommendations = []
-                if crop_or_list:
-                    item = crop_or_list[0]   # just take the first item
-                    if isinstance(item, tuple) and len(item) >= 3:
-                        crop, alt_cost, node_item = item
-                        recommendations.append({
-                            'crop': crop.title() if isinstance(crop, str) else str(crop),
-                            'cost': round(float(alt_cost), 2) if alt_cost else 0
-                        })
-
-                results['greedy'] = {
-                    'success': True,
-                    'perfect_match': None,
-                    'recommendations': recommendations,
-                    'message': 'No perfect match found, showing best alternative',
-                    'error': None
-                }
-                print(f"Greedy Alternatives: {len(recommendations)} found")
-            else:
-                results['greedy'] = {
-                    'success': False,
-                    'perfect_match': None,
-                    'recommendations': [],
-                    'message': 'No suitable crop found with Greedy search',
-                    'error': None
-                }
-                print("Greedy No results found")
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Greedy Search Error: {error_msg}")
-            results['greedy'] = {
-                'success': False,
-                'error': error_msg,
-                'perfect_match': None,
-                'recommendations': [],
-                'message': f'Error in Greedy search: {error_msg}'
-            }
-            
-        # --- Genetic Algorithm ---
-        print("Starting Genetic Algorithm...")
-        try:
-            ga = GeneticAlgorithm(problem)
-            best_solution, best_fitness, best_crop, top_crops = ga.solve("predict")
-            print(f"GA completed. Best crop: {best_crop}, Fitness: {best_fitness}")
-
-            if best_solution and best_crop:
-                formatted_interventions = {}
-                if hasattr(problem, 'interventions') and problem.interventions:
-                    for i, (intervention_name, _) in enumerate(problem.interventions):
-                        if i < len(best_solution):
-                            formatted_interventions[intervention_name] = round(float(best_solution[i]), 1)
-
-                results['genetic'] = {
-                    'success': True,
-                    'best_crop': best_crop.title() if isinstance(best_crop, str) else str(best_crop),
-                    'fitness': round(float(best_fitness), 4),
-                    'interventions': formatted_interventions,
-                    'message': f'Best crop with interventions: {best_crop.title() if isinstance(best_crop, str) else str(best_crop)}',
-                    'error': None
-                }
-                
-            else:
-                results['genetic'] = {
-                    'success': False,
-                    'best_crop': None,
-                    'fitness': 0,
-                    'interventions': {},
-                    'message': 'Genetic algorithm did not find optimal solution',
-                    'error': None
-                }
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Genetic Algorithm Error: {error_msg}")
-            results['genetic'] = {
-                'success': False,
-                'error': error_msg,
-                'best_crop': None,
-                'fitness': 0,
-                'interventions': {},
-                'message': f'Error in genetic algorithm: {error_msg}'
-            }
-            
-        # --- CSP ---
- 
-        print("Starting CSP...")
-        try:
-            csp_result = run_csp(environmental_data)
-            print("CSP completed.")
-
-            if csp_result:
-                # Get the top crop from alternative_crops
-                alternative_crops = csp_result.get('alternative_crops', {})
-                if alternative_crops:
-                    # Sort crops by percentage suitability and get the top one
-                    sorted_crops = sorted(alternative_crops.items(), 
-                                        key=lambda x: x[1]['percentage'], 
-                                        reverse=True)
-                    top_crop_name, top_crop_data = sorted_crops[0]
-                    
-                    # Create a simplified CSP result with just the top recommendation
-                    simplified_csp_result = {
-                        'crop': top_crop_name.title(),
-                        'suitability_percentage': round(top_crop_data['percentage'], 1),
-                        'matching_conditions': [],
-                        'non_matching_conditions': [],
-                        'solution': csp_result.get('solution', {}),
-                        'resources': csp_result.get('resources', {}),
-                        'environment': csp_result.get('environment', {}),
-                        
-                    }
-                    
-                    # Parse the details to separate matching vs non-matching conditions
-                    for detail in top_crop_data.get('details', []):
-                        if '✓' in detail:
-                            simplified_csp_result['matching_conditions'].append(detail)
-                        else:
-                            simplified_csp_result['non_matching_conditions'].append(detail)
-                    
-                    # Convert to ensure JSON serialization
-                    serializable_csp_result = convert_numpy_types(simplified_csp_result)
-                    
-                    results['csp'] = {
-                        'success': True,
-                        'message': f'Best crop recommendation: {top_crop_name.title()}',
-                        'data': serializable_csp_result
-                    }
-                else:
-                    results['csp'] = {
-                        'success': False,
-                        'message': 'No suitable crops found',
-                        'data': None
-                    }
-            else:
-                results['csp'] = {
-                    'success': False,
-                    'message': 'CSP did not find a solution',
-                    'data': None
-                }
-        except Exception as e:
-            error_msg = str(e)
-            print(f"CSP Error: {error_msg}")
-            results['csp'] = {
-                'success': False,
-                'error': error_msg,
-                'message': f'Error in CSP: {error_msg}'
-            }
-        # Convert all results to ensure JSON serialization
-        results = convert_numpy_types(results)
+        results = run_prediction(environmental_data)
 
-        # Store the prediction data in session with correct structure
-        session['prediction_data'] = {
-            'input': environmental_data,  # Store as list for easy indexing
-            'results': results
-        }
+        # Keep the results in the database; the session only remembers which row to show
+        with span('db.save'):
+            result = PredictionResult.create('prediction', environmental_data, results, user_id=session.get('user_id'))
+            db.session.commit()
+        session['prediction_result_id'] = result.id
 
-        print(f"Final results: A* success={bool(results['astar']['success'])}, Greedy success={bool(results['greedy']['success'])}, GA success={bool(results['genetic']['success'])}, CSP success={bool(results['csp']['success'])}")
-        return jsonify({'success': True, 'redirect': '/prediction-results'}), 200
+        logger.info("Final results: A* success=%s, Greedy success=%s, GA success=%s, CSP success=%s",
+                    bool(results['astar']['success']), bool(results['greedy']['success']),
+                    bool(results['genetic']['success']), bool(results['csp']['success']))
+        return jsonify({'success': True, 'redirect': f'/prediction-results/{result.id}'}), 200
 
     except Exception as e:
+        db.session.rollback()
         error_msg = str(e)
-        print(f"General Error: {error_msg}")
+        logger.exception("General Error: %s", error_msg)
         return jsonify({'success': False, 'message': f'Error processing prediction: {error_msg}'}), 500
 
 
+def _can_view(result):
+    """Signed-in users see their own results; anonymous results only in the session that made them."""
+    if result.user_id is not None:
+        return result.user_id == session.get('user_id')
+    return result.id == session.get('prediction_result_id')
+
+
 @prediction_bp.route('/prediction-results')
-def prediction_results():
-    if 'prediction_data' not in session:
+@prediction_bp.route('/prediction-results/<int:result_id>')
+def prediction_results(result_id=None):
+    result_id = result_id or session.get('prediction_result_id')
+    result = PredictionResult.query.get(result_id) if result_id else None
+    if result is None or result.algorithm != 'prediction' or not _can_view(result):
+        flash('Please submit prediction data first')
+        return redirect(url_for('prediction.prediction_page'))
+
+    return render_template('prediction_result.html', prediction_data=result.data)
+
+
+@prediction_bp.route('/prediction-results/live/<job_id>')
+def prediction_live_results(job_id):
+    """Result page for a queued job; engine cards fill in over server-sent events."""
+    job = current_app.extensions['job_queue'].get_for(job_id, session.get('user_id'))
+    if job is None or job['kind'] != 'prediction':
         flash('Please submit prediction data first')
         return redirect(url_for('prediction.prediction_page'))
+    if job['status'] == 'done':
+        session['prediction_result_id'] = job['result_id']
+        return redirect(url_for('prediction.prediction_results', result_id=job['result_id']))
 
-    return render_template('prediction_result.html', prediction_data=session['prediction_data'])
\ No newline at end of file
+    return render_template('prediction_result.html', prediction_data={'input': job['input'], 'results': job['results']},
+                           job_id=job_id)
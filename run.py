@@ -1,11 +1,15 @@
 # run.py
 from app import create_app
 from extensions import db
+from models import PredictionResult
 
 app = create_app()
 
 with app.app_context():
     db.create_all()
+    # create_all() skips tables that already exist, so add indexes introduced since separately
+    for index in PredictionResult.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
 
 if __name__ == '__main__':
     app.run(debug=True)
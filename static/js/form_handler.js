@@ -33,6 +33,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
+            // Submit as a job; the results page then streams each engine's result as it finishes
+            formData.append('async', '1');
+
             // Submit to prediction API
             fetch('/api/predict', {
                 method: 'POST',
@@ -110,6 +113,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
+            // Submit as a job; the results page then streams each engine's result as it finishes
+            formData.append('async', '1');
+
             // Submit to classification API
             fetch('/api/classify', {
                 method: 'POST',
@@ -135,6 +141,12 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Live results page: fill in engine cards as their results arrive
+    const liveResults = document.getElementById('live-results');
+    if (liveResults) {
+        streamEngineResults(liveResults);
+    }
+
     // Add input validation and formatting
     const numberInputs = document.querySelectorAll('input[type="number"]');
     numberInputs.forEach(input => {
@@ -213,6 +225,61 @@ document.addEventListener('DOMContentLoaded', function() {
     document.head.appendChild(style);
 });
 
+// Replace each engine's placeholder card with its result as soon as the server sends it
+function streamEngineResults(liveResults) {
+    const statusUrl = liveResults.dataset.statusUrl;
+
+    // Without EventSource, reload once the job is done to get the full results page
+    if (!window.EventSource) {
+        const poll = setInterval(() => {
+            fetch(statusUrl)
+                .then(response => response.json())
+                .then(data => {
+                    if (data.status === 'done' || data.status === 'failed') {
+                        clearInterval(poll);
+                        window.location.reload();
+                    }
+                });
+        }, 1000);
+        return;
+    }
+
+    const source = new EventSource(liveResults.dataset.eventsUrl);
+
+    source.addEventListener('engine', function(e) {
+        const data = JSON.parse(e.data);
+        const slot = document.getElementById(`${data.engine}-result`);
+        if (slot) {
+            slot.innerHTML = data.html;
+        }
+    });
+
+    source.addEventListener('done', function(e) {
+        source.close();
+        const data = JSON.parse(e.data);
+        // Polling the status once links the saved result to this session, so the permanent URL works
+        fetch(statusUrl).finally(() => {
+            window.history.replaceState(null, '', data.redirect);
+        });
+    });
+
+    source.addEventListener('failed', function(e) {
+        source.close();
+        const data = JSON.parse(e.data);
+        showNotification('Error: ' + (data.error || 'Processing failed'), 'error');
+        document.querySelectorAll('.engine-pending .algorithm-badge').forEach(badge => {
+            badge.textContent = 'Not available';
+        });
+    });
+
+    source.onerror = function() {
+        // The server closes the stream after 'done'/'failed'; anything else is a dropped connection
+        if (source.readyState === EventSource.CLOSED) {
+            showNotification('Lost connection to the server, please refresh the page', 'error');
+        }
+    };
+}
+
 // Utility functions for form handling
 function showNotification(message, type = 'info') {
     const notification = document.createElement('div');
@@ -0,0 +1,196 @@
+# tracing.py
+import cProfile
+import hmac
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, has_request_context, request
+from flask.sessions import SecureCookieSessionInterface
+
+from AI_engine.Log_config import get_logger
+
+# One JSON line per finished request or job, at INFO
+logger = logging.getLogger("tracing.requests")
+log = get_logger(__name__)
+
+# Not worth a log line each: static files and Prometheus scrapes
+UNTRACED_ENDPOINTS = ('static', 'metrics.metrics')
+
+_current = ContextVar("trace", default=None)
+
+
+class Trace:
+    """Timed phases (spans) of one request or background job."""
+    def __init__(self, name, trace_id=None, **attrs):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.attrs = attrs
+        self.spans = []
+        self.started = time.perf_counter()
+
+    def add_span(self, name, start, duration, **attrs):
+        """Record a span that began at perf_counter() value `start` and took `duration` seconds."""
+        self.spans.append({'name': name, 'start_ms': round((start - self.started) * 1000, 3),
+                           'duration_ms': round(duration * 1000, 3), **attrs})
+
+    def to_dict(self, **attrs):
+        return {
+            'event': 'trace',
+            'trace': self.name,
+            'trace_id': self.trace_id,
+            **self.attrs,
+            **attrs,
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'spans': self.spans,
+        }
+
+
+def current_trace():
+    """The trace of the running request or job, or None."""
+    return _current.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the block as a span of the current trace (no-op outside a trace)."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        trace.add_span(name, start, time.perf_counter() - start, **attrs)
+
+
+def record_span(name, duration, **attrs):
+    """Add a span that ended just now and took `duration` seconds, e.g. an engine run timed elsewhere."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add_span(name, time.perf_counter() - duration, duration, **attrs)
+
+
+def start_trace(name, trace_id=None, **attrs):
+    """Make a new trace current; returns (trace, token) for `finish_trace`."""
+    trace = Trace(name, trace_id, **attrs)
+    return trace, _current.set(trace)
+
+
+def finish_trace(trace, token, min_duration_ms=0, **attrs):
+    """Log the trace (unless it was quicker than `min_duration_ms`) and restore the previous one."""
+    _current.reset(token)
+    record = trace.to_dict(**attrs)
+    if record['duration_ms'] >= min_duration_ms:
+        logger.info("%s", json.dumps(record, default=str))
+
+
+@contextmanager
+def traced(name, **attrs):
+    """Trace the block as a whole, e.g. a background job."""
+    trace, token = start_trace(name, **attrs)
+    try:
+        yield trace
+    except Exception:
+        trace.attrs['status'] = 'error'
+        raise
+    finally:
+        trace.attrs.setdefault('status', 'ok')
+        finish_trace(trace, token)
+
+
+class TracedSessionInterface(SecureCookieSessionInterface):
+    """The default cookie session, with its serialization timed as a span."""
+    def save_session(self, app, session, response):
+        with span('session.save'):
+            return super().save_session(app, session, response)
+
+
+def profiling_active():
+    """Whether the current request is being profiled (see init_app)."""
+    return has_request_context() and g.get('profiler') is not None
+
+
+def _profile_requested(app):
+    if not app.config.get('PROFILING_ENABLED'):
+        return False
+    value = request.headers.get(app.config.get('PROFILE_HEADER', 'X-Profile'))
+    if not value:
+        return False
+    token = app.config.get('PROFILE_TOKEN')
+    return token is None or hmac.compare_digest(value.encode(), str(token).encode())
+
+
+def init_app(app):
+    """
+    Trace requests when TRACE_REQUESTS is set and, when PROFILING_ENABLED
+    is set, profile single requests that carry the PROFILE_HEADER header
+    (whose value must be PROFILE_TOKEN when one is configured). The profile
+    of such a request is written to PROFILE_DIR as a cProfile .prof file,
+    named in the X-Profile-File response header; open it with pstats or
+    snakeviz.
+    """
+    if not logger.handlers:
+        # Bare JSON lines, without the usual time/level prefix
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    # Turning tracing on shows the traces unless LOG_LEVELS sets this logger's level itself
+    if app.config.get('TRACE_REQUESTS') and logger.name not in app.config.get('LOG_LEVELS', {}):
+        logger.setLevel(logging.INFO)
+    app.session_interface = TracedSessionInterface()
+
+    @app.before_request
+    def start_request_trace():
+        profile = _profile_requested(app)
+        if not (app.config.get('TRACE_REQUESTS') or profile) or request.endpoint in UNTRACED_ENDPOINTS:
+            return
+        # Keep the caller's request id so its logs and ours line up; ignore anything odd-looking
+        trace_id = request.headers.get('X-Request-ID', '')
+        if not (0 < len(trace_id) <= 64 and trace_id.replace('-', '').isalnum()):
+            trace_id = None
+        g.trace, g.trace_token = start_trace('request', trace_id, method=request.method, path=request.path)
+        if profile:
+            os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+            g.profile_path = os.path.join(
+                app.config['PROFILE_DIR'],
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{g.trace.trace_id[:12]}.prof")
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def tag_response(response):
+        trace = g.get('trace')
+        if trace is not None:
+            g.trace_status = response.status_code
+            response.headers['X-Request-ID'] = trace.trace_id
+            if g.get('profiler') is not None:
+                response.headers['X-Profile-File'] = os.path.basename(g.profile_path)
+        return response
+
+    @app.teardown_request
+    def finish_request_trace(exc):
+        # Runs after the session was saved, so the trace covers the whole response
+        trace = g.get('trace')
+        if trace is None:
+            return
+        attrs = {'status': g.get('trace_status', 500)}
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            try:
+                profiler.dump_stats(g.profile_path)
+                attrs['profile'] = g.profile_path
+            except OSError as e:
+                log.warning("Could not write profile %s: %s", g.profile_path, e)
+        g.pop('trace')
+        finish_trace(trace, g.pop('trace_token'), app.config.get('TRACE_MIN_DURATION_MS', 0), **attrs)